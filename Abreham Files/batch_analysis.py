@@ -0,0 +1,189 @@
+import argparse
+import contextlib
+import glob
+import multiprocessing
+import os
+import time
+import pandas as pd
+import device_analyzer_with_categories as device_analyzer
+from device_lifecycle_risk_analyzer import analyze_device_lifecycle_risk
+from excel_report_writer import EXCEL_MAX_ROWS, write_styled_workbook
+from inventory_store import DEVICES_TABLE, RISK_TABLE, open_store, write_store, table_columns
+from purchase_date_validator import resolve_as_of
+from risk_model import RISK_LEVELS
+from risk_rollup import build_risk_cube, rollup_sheet
+
+# Per-source outputs, written to <output dir>/<source name>/
+ANALYSIS_WORKBOOK = 'device_analysis_with_categories.xlsx'
+RISK_WORKBOOK = 'device_lifecycle_risk_analysis.xlsx'
+SOURCE_STORE = 'inventory_store.db'
+
+# Consolidated outputs, written to the output dir itself
+CONSOLIDATED_WORKBOOK = 'consolidated_risk_analysis.xlsx'
+CONSOLIDATED_STORE = 'consolidated_store.db'
+
+BATCH_SHEET_COLORS = {
+    'Batch_Summary': ('8E44AD', 'E8DAEF'),
+    'Source_Risk_Rollup': ('2C3E50', 'EBF5FB'),
+    'Source_Site_Risk_Rollup': ('2C3E50', 'EBF5FB'),
+    'Consolidated_Risk_Analysis': ('1F4E79', 'D6EAF8')
+}
+
+def find_inventory_files(source):
+    """Inventory exports to process: every *.csv in a directory, or the files matching a glob, in name order"""
+    pattern = os.path.join(source, '*.csv') if os.path.isdir(source) else source
+    return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+
+def source_names(csv_paths):
+    """A unique, folder-safe name per file (its file name without extension; repeats get _2, _3, ...)"""
+    names, seen = [], {}
+    for path in csv_paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        seen[stem] = seen.get(stem, 0) + 1
+        names.append(stem if seen[stem] == 1 else f"{stem}_{seen[stem]}")
+    return names
+
+def analyze_source(task):
+    """
+    Worker: run the device analyzer and the risk analyzer on one inventory export into its own folder
+    (console output goes to analysis.log there). Both load their results into the folder's SQLite store,
+    which the consolidation step reads back. Failures are reported, not raised, so one bad export
+    doesn't stop the batch.
+    """
+    source, csv_path, source_dir, as_of = task
+    os.makedirs(source_dir, exist_ok=True)
+    analysis_path = os.path.join(source_dir, ANALYSIS_WORKBOOK)
+    store_path = os.path.join(source_dir, SOURCE_STORE)
+    if os.path.exists(store_path):
+        os.remove(store_path)
+
+    started = time.perf_counter()
+    result = {'Source': source, 'Source_File': csv_path, 'Status': 'OK', 'Error': ''}
+    try:
+        with open(os.path.join(source_dir, 'analysis.log'), 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log):
+            if device_analyzer.main(as_of=as_of, csv_path=csv_path, output_path=analysis_path,
+                                    store_path=store_path) is None:
+                raise RuntimeError("device analyzer could not load the export (see analysis.log)")
+            if analyze_device_lifecycle_risk(analysis_path, os.path.join(source_dir, RISK_WORKBOOK), as_of=as_of,
+                                             store_path=store_path) is None:
+                # Still a valid export (e.g. only retired devices) - its devices are consolidated, just not scored
+                result['Status'] = 'NO_READY_DEVICES'
+        if not os.path.exists(store_path):
+            raise RuntimeError("results could not be saved (see analysis.log)")
+    except Exception as e:
+        result.update(Status='FAILED', Error=f"{type(e).__name__}: {e}")
+    result['Seconds'] = round(time.perf_counter() - started, 2)
+    return result
+
+def read_source_tables(results, output_dir):
+    """All sources' devices and scored devices from their stores, tagged with Source / Source_File"""
+    devices, scored = [], []
+    for result in results:
+        store_path = os.path.join(output_dir, result['Source'], SOURCE_STORE)
+        if result['Status'] == 'FAILED' or not os.path.exists(store_path):
+            continue
+        conn = open_store(store_path)
+        try:
+            for table, frames in ((DEVICES_TABLE, devices), (RISK_TABLE, scored)):
+                if not table_columns(conn, table):
+                    continue
+                frame = pd.read_sql_query(f'SELECT * FROM "{table}"', conn)
+                frame.insert(0, 'Source_File', result['Source_File'])
+                frame.insert(0, 'Source', result['Source'])
+                frames.append(frame)
+        finally:
+            conn.close()
+    return tuple(pd.concat(frames, ignore_index=True) if frames else pd.DataFrame() for frames in (devices, scored))
+
+def build_batch_summary(results, devices, scored):
+    """One row per source: status, devices, analysis-ready and per-level counts, run time"""
+    summary = pd.DataFrame(results)
+    device_counts = devices.groupby('Source').size() if len(devices) else pd.Series(dtype=int)
+    summary['Devices'] = summary['Source'].map(device_counts).fillna(0).astype(int)
+    level_counts = (scored.groupby(['Source', 'Risk_Level']).size().unstack(fill_value=0)
+                    if len(scored) else pd.DataFrame())
+    summary['Analysis_Ready'] = 0
+    for level in RISK_LEVELS:
+        counts = level_counts[level] if level in level_counts.columns else pd.Series(dtype=int)
+        summary[level] = summary['Source'].map(counts).fillna(0).astype(int)
+        summary['Analysis_Ready'] += summary[level]
+    return summary[['Source', 'Source_File', 'Status', 'Devices', 'Analysis_Ready'] + RISK_LEVELS + ['Seconds', 'Error']]
+
+def run_batch(source, output_dir='batch_output', workers=None, as_of=None):
+    """
+    Analyze every inventory export in a directory or glob with a process pool of `workers` processes
+    (default: one per core). Each export gets its own folder of outputs; the results are then merged
+    into a consolidated workbook and SQLite store with Source / Source_File provenance on every device.
+    Returns the batch summary (one row per export).
+    """
+    as_of = str(resolve_as_of(as_of).date())
+    csv_paths = find_inventory_files(source)
+    if not csv_paths:
+        raise FileNotFoundError(f"No inventory CSV files found for {source}")
+    workers = max(1, min(workers or os.cpu_count() or 1, len(csv_paths)))
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [(name, path, os.path.join(output_dir, name), as_of) for name, path in zip(source_names(csv_paths), csv_paths)]
+    print(f"📂 {len(tasks)} inventory exports, {workers} worker processes, as-of {as_of}")
+
+    started = time.perf_counter()
+    results = []
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(workers) as pool:
+        for result in pool.imap_unordered(analyze_source, tasks):
+            results.append(result)
+            mark = {'OK': '✅', 'FAILED': '❌'}.get(result['Status'], '⚠️ ')
+            print(f"  {mark} [{len(results)}/{len(tasks)}] {result['Source']} ({result['Seconds']:.1f}s)"
+                  + (f" - {result['Error']}" if result['Error'] else ''))
+    # Back to file order, whatever order the workers finished in
+    order = {name: position for position, (name, _, _, _) in enumerate(tasks)}
+    results.sort(key=lambda result: order[result['Source']])
+    print(f"⚡ Analyzed {len(tasks)} exports in {time.perf_counter() - started:.1f}s")
+
+    print("\n🔗 Consolidating results...")
+    devices, scored = read_source_tables(results, output_dir)
+    summary = build_batch_summary(results, devices, scored)
+    loaded = write_store(os.path.join(output_dir, CONSOLIDATED_STORE), {DEVICES_TABLE: devices, RISK_TABLE: scored}) \
+        if len(devices) else {}
+    if loaded:
+        print(f"🗄️  Consolidated store: {loaded.get(DEVICES_TABLE, 0)} devices, {loaded.get(RISK_TABLE, 0)} scored "
+              f"({os.path.join(output_dir, CONSOLIDATED_STORE)})")
+
+    sheets = [('Batch_Summary', summary)]
+    if len(scored):
+        cube = build_risk_cube(scored, ['Source', 'Site'])
+        sheets.append(('Source_Risk_Rollup', rollup_sheet(cube, ('Source',))))
+        if 'Site' in cube['dimensions']:
+            sheets.append(('Source_Site_Risk_Rollup', rollup_sheet(cube, ('Source', 'Site'))))
+        if len(scored) > EXCEL_MAX_ROWS:
+            print(f"  ⚠️  {len(scored)} scored devices exceed the Excel sheet limit - the workbook keeps the first "
+                  f"{EXCEL_MAX_ROWS}, the consolidated store has them all")
+        sheets.append(('Consolidated_Risk_Analysis', scored.head(EXCEL_MAX_ROWS)))
+    consolidated_path = os.path.join(output_dir, CONSOLIDATED_WORKBOOK)
+    write_styled_workbook(consolidated_path, [(name, frame) + BATCH_SHEET_COLORS[name] for name, frame in sheets])
+    print(f"✅ Consolidated workbook saved to {consolidated_path}")
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the DLM analyzers over many inventory exports in parallel')
+    parser.add_argument('source', help="directory of inventory CSVs, or a glob such as 'exports/district_*.csv'")
+    parser.add_argument('--output-dir', default='batch_output')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--as-of', default=None, help='date device ages are measured against (default: today)')
+    args = parser.parse_args()
+
+    print("🗂️  DLM Batch Analysis")
+    print("=" * 60)
+    try:
+        summary = run_batch(args.source, args.output_dir, args.workers, args.as_of)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        return
+
+    print(f"\n{'Source':<40} {'Devices':>8} {'Ready':>7} {'HIGH':>6} {'MEDIUM':>7} {'LOW':>6}")
+    for _, row in summary.iterrows():
+        print(f"{row['Source'][:40]:<40} {row['Devices']:>8} {row['Analysis_Ready']:>7} {row['HIGH RISK']:>6} "
+              f"{row['MEDIUM RISK']:>7} {row['LOW RISK']:>6}" + ('  ❌ ' + row['Error'] if row['Error'] else '')
+              + ('  ⚠️  no analysis-ready devices' if row['Status'] == 'NO_READY_DEVICES' else ''))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import argparse
+import contextlib
+import csv
+import importlib.util
+import os
+import time
+import device_analyzer_with_categories as device_analyzer
+from device_analyzer_streaming import stream_device_analysis
+from device_lifecycle_risk_analyzer import analyze_device_lifecycle_risk
+from excel_report_writer import EXCEL_MAX_ROWS
+from inventory_generator import write_synthetic_csv
+from pipeline_instrumentation import start_run, start_stage, end_stage, finish_run
+from purchase_date_validator import resolve_as_of
+
+# Standard benchmark sizes; 1M and 10M take a long time and are opt-in via --sizes
+DEFAULT_SIZES = [10000, 100000]
+ALL_SIZES = [10000, 100000, 1000000, 10000000]
+
+VICTOR_TOOL_PATH = os.path.join('..', "Victor's Code", 'invetory_Assessment_Tool.py')
+
+RESULT_FIELDS = ['run_id', 'timestamp', 'layout', 'rows', 'tool', 'stage',
+                 'wall_seconds', 'cpu_seconds', 'peak_rss_mb', 'rows_per_second']
+
+def load_victor_tool(tool_path=VICTOR_TOOL_PATH):
+    """Import Victor's assessment tool from its own folder (it isn't a package)"""
+    spec = importlib.util.spec_from_file_location('invetory_Assessment_Tool', tool_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def report_rows(report, run_id, layout, n_rows, tool):
+    """Flatten a run report into result rows: one per stage plus a TOTAL row"""
+    if report is None:
+        return []
+    stages = report['stages'] + [{
+        'stage': 'TOTAL',
+        'wall_seconds': report['wall_seconds'],
+        'cpu_seconds': report['cpu_seconds'],
+        'peak_rss_mb': report['peak_rss_mb']
+    }]
+    rows = []
+    for stage in stages:
+        wall = stage['wall_seconds']
+        rows.append({
+            'run_id': run_id,
+            'timestamp': report['started_at'],
+            'layout': layout,
+            'rows': n_rows,
+            'tool': tool,
+            'stage': stage['stage'],
+            'wall_seconds': wall,
+            'cpu_seconds': stage['cpu_seconds'],
+            'peak_rss_mb': stage['peak_rss_mb'],
+            'rows_per_second': round(n_rows / wall) if wall else None
+        })
+    return rows
+
+def run_quietly(log_path, func, *args, **kwargs):
+    """Run one tool with its console output sent to a log file"""
+    with open(log_path, 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log):
+        return func(*args, **kwargs)
+
+def benchmark_inventory_layout(n_rows, work_dir, as_of, seed):
+    """Generate an Inventory.csv-layout file and time the device analyzer and the risk analyzer on it"""
+    reports = []
+    prefix = os.path.join(work_dir, f"inventory_{n_rows}")
+    csv_path = prefix + '.csv'
+
+    generate_report = start_run('generate')
+    stage = start_stage(generate_report, 'write_csv')
+    write_synthetic_csv(csv_path, n_rows, layout='inventory', seed=seed, as_of=as_of)
+    end_stage(generate_report, stage, rows_out=n_rows)
+    reports.append(('generator', finish_run(generate_report)))
+
+    if n_rows > EXCEL_MAX_ROWS:
+        # Too big for one Excel sheet: benchmark the chunked streaming analyzer instead
+        stream_report = start_run('device_analyzer_streaming')
+        stage = start_stage(stream_report, 'stream_device_analysis', rows_in=n_rows)
+        run_quietly(prefix + '_analyzer.log', stream_device_analysis, csv_path, prefix + '_streaming', as_of=as_of)
+        end_stage(stream_report, stage, rows_out=n_rows)
+        reports.append(('device_analyzer_streaming', finish_run(stream_report)))
+        print(f"  ⚠️  {n_rows} rows exceed the Excel sheet limit - risk analyzer skipped, streaming analyzer timed")
+        return reports
+
+    analysis_path = prefix + '_analysis.xlsx'
+    analyzer_report = run_quietly(
+        prefix + '_analyzer.log', device_analyzer.main, as_of=as_of,
+        csv_path=csv_path, output_path=analysis_path, report_path=prefix + '_analyzer_run_report.json'
+    )
+    reports.append(('device_analyzer', analyzer_report))
+
+    risk_report = run_quietly(
+        prefix + '_risk.log', analyze_device_lifecycle_risk, analysis_path, prefix + '_risk.xlsx',
+        as_of=as_of, report_path=prefix + '_risk_run_report.json'
+    )
+    reports.append(('device_lifecycle_risk_analyzer', risk_report))
+    return reports
+
+def benchmark_assets_layout(n_rows, work_dir, as_of, seed, victor_tool):
+    """Generate an assets.csv-layout file and time Victor's tool stage by stage"""
+    prefix = os.path.join(work_dir, f"assets_{n_rows}")
+    csv_path = prefix + '.csv'
+    write_synthetic_csv(csv_path, n_rows, layout='assets', seed=seed, as_of=as_of)
+
+    report = start_run('invetory_Assessment_Tool')
+    stage = start_stage(report, 'load_csv')
+    df = victor_tool.load_csv(csv_path)
+    end_stage(report, stage, rows_out=len(df))
+
+    stage = start_stage(report, 'clean_data', rows_in=len(df))
+    df = victor_tool.clean_data(df, log_file=prefix + '_cleaning_log.txt')
+    end_stage(report, stage, rows_out=len(df))
+
+    stage = start_stage(report, 'apply_risk_analysis', rows_in=len(df))
+    df_result = victor_tool.apply_risk_analysis(df, as_of=as_of.to_pydatetime())
+    end_stage(report, stage, rows_out=len(df_result))
+
+    if len(df_result) <= EXCEL_MAX_ROWS:
+        stage = start_stage(report, 'export_results', rows_in=len(df_result))
+        victor_tool.export_results(df_result, filename=prefix + '_processed_inventory.xlsx')
+        end_stage(report, stage)
+    else:
+        print(f"  ⚠️  {len(df_result)} rows exceed the Excel sheet limit - export_results skipped")
+    return [('invetory_Assessment_Tool', finish_run(report))]
+
+def append_results(results_path, rows):
+    """Append result rows to the CSV history (header written on first use)"""
+    new_file = not os.path.exists(results_path)
+    with open(results_path, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        if new_file:
+            writer.writeheader()
+        writer.writerows(rows)
+
+def run_benchmarks(sizes=DEFAULT_SIZES, layouts=('inventory', 'assets'), work_dir='benchmark_runs',
+                   results_path='benchmark_results.csv', as_of='2025-07-01', seed=0):
+    """
+    Benchmark every tool on synthetic inventories of each size and append the per-stage results
+    (wall/CPU time, peak RSS, rows per second) to results_path for throughput-vs-size charts.
+    A fixed as-of date keeps the generated data and the age-based results comparable between runs.
+    Note: peak RSS is per process, so later (larger) sizes in the same run include earlier peaks.
+    """
+    as_of = resolve_as_of(as_of)
+    os.makedirs(work_dir, exist_ok=True)
+    run_id = time.strftime('%Y%m%d-%H%M%S')
+    victor_tool = load_victor_tool() if 'assets' in layouts else None
+
+    all_rows = []
+    for n_rows in sizes:
+        print(f"\n📏 Benchmarking {n_rows:,} rows...")
+        reports = []
+        if 'inventory' in layouts:
+            reports += [('inventory', tool, report) for tool, report in benchmark_inventory_layout(n_rows, work_dir, as_of, seed)]
+        if 'assets' in layouts:
+            reports += [('assets', tool, report) for tool, report in benchmark_assets_layout(n_rows, work_dir, as_of, seed, victor_tool)]
+
+        for layout, tool, report in reports:
+            rows = report_rows(report, run_id, layout, n_rows, tool)
+            append_results(results_path, rows)
+            all_rows.extend(rows)
+            if report is not None:
+                rate = n_rows / report['wall_seconds'] if report['wall_seconds'] else 0
+                print(f"  ⏱️  {tool:<34} {report['wall_seconds']:>9.2f}s  {rate:>12,.0f} rows/s")
+
+    print(f"\n📊 Results appended to {results_path} (run {run_id})")
+    return all_rows
+
+def main():
+    parser = argparse.ArgumentParser(description='Scaling benchmark for the DLM inventory tools')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help=f"row counts to benchmark (full suite: {' '.join(str(size) for size in ALL_SIZES)})")
+    parser.add_argument('--layouts', nargs='+', choices=['inventory', 'assets'], default=['inventory', 'assets'])
+    parser.add_argument('--work-dir', default='benchmark_runs')
+    parser.add_argument('--results', default='benchmark_results.csv')
+    parser.add_argument('--as-of', default='2025-07-01')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    run_benchmarks(args.sizes, args.layouts, args.work_dir, args.results, args.as_of, args.seed)
+
+if __name__ == "__main__":
+    main()
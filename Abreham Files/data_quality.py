@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+# One bit per data-quality check. A new check takes the next free bit (uint16 leaves room for 16 checks).
+MISSING_BRAND = 1            # Brand blank after normalization
+MISSING_CATEGORY = 2         # Category blank after normalization
+INVALID_PURCHASE_DATE = 4    # Purchase_Date_Status is not 'Valid'
+NOT_ACTIVE = 8               # status class is not ACTIVE (inactive, unknown or missing status)
+RAW_BRAND_MISSING = 16       # Brand blank in the source data, before normalization
+RAW_CATEGORY_MISSING = 32    # Category blank in the source data, before normalization
+STATUS_INACTIVE = 64         # status class INACTIVE
+STATUS_UNKNOWN = 128         # status class UNKNOWN
+
+QUALITY_MASK_DTYPE = np.uint16
+QUALITY_MASK_VALUES = 256    # distinct mask values with the bits above (bincount length)
+
+# Checks a fully valid device must pass, and the ones that put a device in All_Invalid_Data
+FULLY_VALID_BITS = MISSING_BRAND | MISSING_CATEGORY | INVALID_PURCHASE_DATE
+ISSUE_BITS = FULLY_VALID_BITS | NOT_ACTIVE
+
+# Issues_Found wording per issue bit, in the order the issues are listed
+ISSUE_TEXTS = [
+    (MISSING_BRAND, 'Missing Brand'),
+    (MISSING_CATEGORY, 'Missing Category'),
+    (INVALID_PURCHASE_DATE, 'Invalid Purchase Date ({Purchase_Date_Status})'),
+    (NOT_ACTIVE, 'Inactive Status ({Status_Normalized})')
+]
+
+# Issues_Found template for every combination of issue bits
+ISSUE_TEMPLATES = {
+    mask: ' | '.join(text for bit, text in ISSUE_TEXTS if mask & bit)
+    for mask in range(ISSUE_BITS + 1) if mask & ~ISSUE_BITS == 0
+}
+
+def is_blank(series):
+    """Mask of values that are missing or empty after stripping whitespace"""
+    return (series.isna() | (series.astype(str).str.strip() == '')).to_numpy()
+
+def new_quality_mask(n_rows):
+    """A mask with no checks failed yet, one integer per device"""
+    return np.zeros(n_rows, dtype=QUALITY_MASK_DTYPE)
+
+def flag_check(quality_mask, bit, failed):
+    """Set a check's bit (in place) on the devices that failed it"""
+    quality_mask[np.asarray(failed, dtype=bool)] |= QUALITY_MASK_DTYPE(bit)
+    return quality_mask
+
+def flag_status_checks(quality_mask, status_class):
+    """Set the status bits from a Status_Class series (missing statuses are only NOT_ACTIVE)"""
+    flag_check(quality_mask, NOT_ACTIVE, (status_class != 'ACTIVE').to_numpy())
+    flag_check(quality_mask, STATUS_INACTIVE, (status_class == 'INACTIVE').to_numpy())
+    flag_check(quality_mask, STATUS_UNKNOWN, (status_class == 'UNKNOWN').to_numpy())
+    return quality_mask
+
+def has_any(quality_mask, bits):
+    """Devices that failed at least one of the checks in bits"""
+    return (quality_mask & bits) != 0
+
+def has_none(quality_mask, bits):
+    """Devices that passed every check in bits"""
+    return (quality_mask & bits) == 0
+
+def mask_counts(quality_mask):
+    """Devices per mask value - additive, so chunk counts can simply be summed"""
+    return np.bincount(quality_mask, minlength=QUALITY_MASK_VALUES)
+
+def render_issues(quality_mask, date_status, status_label):
+    """
+    Issues_Found text per device from the ISSUE_TEMPLATES lookup. Only the distinct
+    (issue bits, date status, status label) combinations are formatted, then mapped back to every device.
+    """
+    keys = pd.MultiIndex.from_arrays([quality_mask & ISSUE_BITS, date_status.to_numpy(dtype=object),
+                                      status_label.to_numpy(dtype=object)])
+    codes, uniques = pd.factorize(keys)
+    texts = np.array([ISSUE_TEMPLATES[mask].format(Purchase_Date_Status=date, Status_Normalized=status)
+                      for mask, date, status in uniques], dtype=object)
+    return pd.Series(texts[codes], index=date_status.index)
+
+def build_quality_summary(counts, analysis_ready_count=None):
+    """
+    Data_Quality_Summary table from the devices per mask value (see mask_counts).
+    analysis_ready_count overrides the mask's count of active, fully valid devices
+    (the batch analyzer selects those through an Asset Tag ID merge).
+    """
+    mask_values = np.arange(len(counts))
+    total = int(counts.sum())
+
+    def count_any(bits):
+        return int(counts[(mask_values & bits) != 0].sum())
+
+    fully_valid = total - count_any(FULLY_VALID_BITS)
+    analysis_ready = total - count_any(ISSUE_BITS) if analysis_ready_count is None else analysis_ready_count
+    valid_counts = [
+        total - count_any(MISSING_BRAND),
+        total - count_any(MISSING_CATEGORY),
+        total - count_any(INVALID_PURCHASE_DATE),
+        total - count_any(NOT_ACTIVE),
+        fully_valid,
+        analysis_ready
+    ]
+    invalid_counts = [
+        count_any(RAW_BRAND_MISSING),
+        count_any(RAW_CATEGORY_MISSING),
+        count_any(INVALID_PURCHASE_DATE),
+        count_any(STATUS_INACTIVE) + count_any(STATUS_UNKNOWN),
+        total - fully_valid,
+        total - analysis_ready
+    ]
+    return pd.DataFrame({
+        'Data Category': ['Brands', 'Categories', 'Purchase Dates', 'Device Status', 'Fully Valid Data', 'Analysis Ready Data'],
+        'Valid Count': valid_counts,
+        'Invalid Count': invalid_counts,
+        'Total Devices': [total] * len(valid_counts),
+        'Valid Percentage': [round((count / total) * 100, 1) for count in valid_counts],
+        'Invalid Percentage': [round((count / total) * 100, 1) for count in invalid_counts]
+    })
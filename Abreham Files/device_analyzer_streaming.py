@@ -0,0 +1,189 @@
+import os
+import numpy as np
+from device_analyzer_with_categories import read_device_data
+from device_status_classifier import classify_statuses
+from device_value_normalizer import load_replacement_tables, normalize_column
+from purchase_date_validator import resolve_as_of, validate_purchase_dates, parse_purchase_dates, calculate_age_years
+from data_quality import (MISSING_BRAND, MISSING_CATEGORY, INVALID_PURCHASE_DATE, NOT_ACTIVE, RAW_BRAND_MISSING,
+                          RAW_CATEGORY_MISSING, STATUS_INACTIVE, STATUS_UNKNOWN, FULLY_VALID_BITS, ISSUE_BITS,
+                          is_blank, new_quality_mask, flag_check, flag_status_checks, has_any, has_none,
+                          mask_counts, render_issues, build_quality_summary)
+from risk_model import RISK_LEVELS, load_risk_model, apply_risk_scores
+from risk_ranking import DEFAULT_TOP_K, start_running_top_k, update_running_top_k, running_top_k_result, add_priority_rank
+
+# Rows per chunk - peak memory scales with this, not with the size of the inventory
+DEFAULT_CHUNK_SIZE = 100000
+
+# Derived columns that the clean partitions leave out (same as the Fully_Valid_Data sheet)
+DERIVED_COLUMNS = ['Purchase_Date_Parsed', 'Purchase_Date_Status', 'Device_Age_Years', 'Status_Normalized']
+
+# Output partitions, each appended to its own CSV file chunk by chunk
+PARTITIONS = [
+    'All_Brands_Recognized', 'Brands_Unrecognized',
+    'All_Categories_Recognized', 'Categories_Unrecognized',
+    'Available_Active_Devices', 'Unavailable_Inactive_Devices', 'Unknown_Status_Devices',
+    'Valid_Purchase_Dates', 'Invalid_Purchase_Dates',
+    'Fully_Valid_Data', 'All_Invalid_Data', 'Analysis_Ready_Data'
+]
+
+def process_inventory_chunk(chunk, brand_replacements, category_replacements, as_of):
+    """
+    Run the per-row stages (status, brand, category, date validation, issue detection) on one chunk.
+    Returns (enriched chunk, {partition name: rows}, chunk aggregates).
+    """
+    chunk = chunk.copy()
+
+    # Status
+    status_class, chunk['Status_Normalized'] = classify_statuses(chunk['Status'])
+    quality_mask = flag_status_checks(new_quality_mask(len(chunk)), status_class)
+
+    # Brand and category (unrecognized is judged on the raw values, recognized after normalization)
+    flag_check(quality_mask, RAW_BRAND_MISSING, is_blank(chunk['Brand']))
+    flag_check(quality_mask, RAW_CATEGORY_MISSING, is_blank(chunk['Category']))
+    chunk['Brand'], brand_names = normalize_column(chunk['Brand'], brand_replacements)
+    chunk['Category'], category_names = normalize_column(chunk['Category'], category_replacements)
+    flag_check(quality_mask, MISSING_BRAND, is_blank(chunk['Brand']))
+    flag_check(quality_mask, MISSING_CATEGORY, is_blank(chunk['Category']))
+
+    # Purchase dates
+    chunk['Purchase_Date_Parsed'], chunk['Purchase_Date_Status'] = validate_purchase_dates(chunk['Purchase Date'], as_of=as_of)
+    chunk['Device_Age_Years'] = calculate_age_years(chunk['Purchase_Date_Parsed'], as_of=as_of).round(1)
+    flag_check(quality_mask, INVALID_PURCHASE_DATE, (chunk['Purchase_Date_Status'] != 'Valid').to_numpy())
+    date_valid = has_none(quality_mask, INVALID_PURCHASE_DATE)
+
+    # Issue detection (Issues_Found looked up from the mask value)
+    all_invalid = has_any(quality_mask, ISSUE_BITS)
+    invalid_rows = chunk[all_invalid].copy()
+    if len(invalid_rows) > 0:
+        invalid_rows['Issues_Found'] = render_issues(quality_mask[all_invalid], invalid_rows['Purchase_Date_Status'],
+                                                     invalid_rows['Status_Normalized'])
+
+    fully_valid = has_none(quality_mask, FULLY_VALID_BITS)
+    partitions = {
+        'All_Brands_Recognized': chunk[has_none(quality_mask, MISSING_BRAND)],
+        'Brands_Unrecognized': chunk[has_any(quality_mask, RAW_BRAND_MISSING)],
+        'All_Categories_Recognized': chunk[has_none(quality_mask, MISSING_CATEGORY)],
+        'Categories_Unrecognized': chunk[has_any(quality_mask, RAW_CATEGORY_MISSING)],
+        'Available_Active_Devices': chunk[has_none(quality_mask, NOT_ACTIVE)],
+        'Unavailable_Inactive_Devices': chunk[has_any(quality_mask, STATUS_INACTIVE)],
+        'Unknown_Status_Devices': chunk[has_any(quality_mask, STATUS_UNKNOWN)],
+        'Valid_Purchase_Dates': chunk[date_valid],
+        'Invalid_Purchase_Dates': chunk[~date_valid],
+        'Fully_Valid_Data': chunk[fully_valid].drop(columns=DERIVED_COLUMNS),
+        'All_Invalid_Data': invalid_rows,
+        'Analysis_Ready_Data': chunk[has_none(quality_mask, ISSUE_BITS)].drop(columns=DERIVED_COLUMNS)
+    }
+
+    valid_ages = chunk.loc[date_valid, 'Device_Age_Years']
+    aggregates = {
+        'rows': len(chunk),
+        'counts': {name: len(rows) for name, rows in partitions.items()},
+        'mask_counts': mask_counts(quality_mask),
+        'brand_names': brand_names,
+        'category_names': category_names,
+        'status_counts': chunk['Status_Normalized'].value_counts(),
+        'date_status_counts': chunk['Purchase_Date_Status'].value_counts(),
+        'age_sum': valid_ages.sum(),
+        'age_count': valid_ages.count(),
+        'age_min': valid_ages.min(),
+        'age_max': valid_ages.max()
+    }
+    return chunk, partitions, aggregates
+
+def merge_aggregates(totals, aggregates):
+    """Fold one chunk's aggregates into the running totals"""
+    if totals is None:
+        return aggregates
+    totals['rows'] += aggregates['rows']
+    totals['mask_counts'] = totals['mask_counts'] + aggregates['mask_counts']
+    for name, count in aggregates['counts'].items():
+        totals['counts'][name] += count
+    totals['brand_names'] |= aggregates['brand_names']
+    totals['category_names'] |= aggregates['category_names']
+    totals['status_counts'] = totals['status_counts'].add(aggregates['status_counts'], fill_value=0)
+    totals['date_status_counts'] = totals['date_status_counts'].add(aggregates['date_status_counts'], fill_value=0)
+    totals['age_sum'] += aggregates['age_sum']
+    totals['age_count'] += aggregates['age_count']
+    totals['age_min'] = np.nanmin([totals['age_min'], aggregates['age_min']])
+    totals['age_max'] = np.nanmax([totals['age_max'], aggregates['age_max']])
+    return totals
+
+def score_analysis_ready(rows, as_of, model):
+    """Risk-score one chunk's Analysis_Ready_Data rows the way the risk analyzer does (unrounded ages)"""
+    rows = rows.copy()
+    rows['Device_Age_Years'] = calculate_age_years(parse_purchase_dates(rows['Purchase Date']), as_of=as_of)
+    return apply_risk_scores(rows, model)
+
+def stream_device_analysis(csv_path, output_dir, chunksize=DEFAULT_CHUNK_SIZE, as_of=None, priority_top_k=None):
+    """
+    Streaming mode of the device analyzer for inventories that don't fit comfortably in RAM.
+    Reads the CSV in fixed-size chunks, runs the per-row stages on each chunk and appends every
+    output partition to its own CSV in output_dir; only the small aggregates are kept in memory.
+    Notes: partitions keep all derived columns (except the clean Fully_Valid/Analysis_Ready data),
+    and the analysis-ready filter is applied per row rather than through an Asset Tag ID merge.
+    priority_top_k: also risk-score the analysis-ready rows of each chunk and keep a running top K per
+                    risk level, written to Top_Priority_Devices.csv (only K rows per level stay in memory)
+    """
+    as_of = resolve_as_of(as_of)
+    brand_replacements, category_replacements = load_replacement_tables()
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Start every partition file fresh
+    partition_paths = {name: os.path.join(output_dir, f"{name}.csv") for name in PARTITIONS}
+    for path in partition_paths.values():
+        if os.path.exists(path):
+            os.remove(path)
+
+    priority = start_running_top_k(priority_top_k, 'Risk_Level') if priority_top_k else None
+    risk_model = load_risk_model() if priority_top_k else None
+    totals = None
+    for chunk_number, chunk in enumerate(read_device_data(csv_path, chunksize=chunksize), start=1):
+        _, partitions, aggregates = process_inventory_chunk(chunk, brand_replacements, category_replacements, as_of)
+        for name, rows in partitions.items():
+            if len(rows) > 0:
+                path = partition_paths[name]
+                rows.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+        totals = merge_aggregates(totals, aggregates)
+        if priority is not None:
+            update_running_top_k(priority, score_analysis_ready(partitions['Analysis_Ready_Data'], as_of, risk_model))
+        print(f"  📦 Processed chunk {chunk_number}: {totals['rows']} rows so far")
+
+    if totals is None:
+        print(f"No rows found in {csv_path}")
+        return None
+
+    summary_df = build_quality_summary(totals['mask_counts'])
+    summary_df.to_csv(os.path.join(output_dir, 'Data_Quality_Summary.csv'), index=False)
+    if priority is not None:
+        priority_devices = running_top_k_result(priority)
+        if len(priority_devices) > 0:
+            # HIGH, MEDIUM, LOW like the risk analyzer's Top_Priority_Devices sheet
+            priority_devices = add_priority_rank(priority_devices).sort_values(
+                'Risk_Level', key=lambda levels: levels.map(RISK_LEVELS.index), kind='stable')
+        priority_devices.to_csv(os.path.join(output_dir, 'Top_Priority_Devices.csv'), index=False)
+    return totals
+
+def main():
+    csv_path = 'Inventory.csv'
+    output_dir = 'streaming_output'
+
+    try:
+        totals = stream_device_analysis(csv_path, output_dir, priority_top_k=DEFAULT_TOP_K)
+    except FileNotFoundError:
+        print(f"Error: Could not find the CSV file at {csv_path}")
+        return
+    if totals is None:
+        return
+
+    print("\n=== STREAMING ANALYSIS RESULTS ===")
+    print(f"Total devices processed: {totals['rows']}")
+    print(f"Unique normalized brands: {len(totals['brand_names'])}")
+    print(f"Unique normalized categories: {len(totals['category_names'])}")
+    if totals['age_count'] > 0:
+        print(f"Average device age: {totals['age_sum'] / totals['age_count']:.1f} years")
+    for name in PARTITIONS:
+        print(f"  {name}: {totals['counts'][name]} devices")
+    print(f"\n📂 Partitions and top-{DEFAULT_TOP_K} priority list saved to {output_dir}")
+
+if __name__ == "__main__":
+    main()
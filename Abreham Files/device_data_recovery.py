@@ -0,0 +1,107 @@
+import numpy as np
+from data_quality import is_blank
+from keyword_matcher import compile_keyword_matcher, match_text, match_series
+
+# Common brand patterns and keywords
+BRAND_PATTERNS = {
+    'apple': ['apple', 'ipad', 'iphone', 'macbook', 'imac'],
+    'hp': ['hp', 'hewlett packard', 'pavilion', 'elitebook', 'probook'],
+    'dell': ['dell', 'latitude', 'optiplex', 'inspiron', 'precision'],
+    'lenovo': ['lenovo', 'thinkpad', 'ideapad', 'yoga'],
+    'microsoft': ['microsoft', 'surface', 'xbox'],
+    'samsung': ['samsung', 'galaxy'],
+    'lg': ['lg electronics', 'lg'],
+    'canon': ['canon', 'pixma', 'imageclass'],
+    'epson': ['epson', 'workforce', 'expression'],
+    'cisco': ['cisco', 'catalyst', 'meraki'],
+    'acer': ['acer', 'aspire', 'predator'],
+    'asus': ['asus', 'zenbook', 'vivobook'],
+    'logitech': ['logitech', 'mx master', 'k400'],
+    'sony': ['sony', 'vaio', 'playstation']
+}
+
+# Category patterns and keywords
+CATEGORY_PATTERNS = {
+    'laptop': ['laptop', 'notebook', 'macbook', 'thinkpad', 'elitebook', 'latitude'],
+    'desktop': ['desktop', 'pc', 'optiplex', 'imac', 'all-in-one'],
+    'tablet': ['tablet', 'ipad', 'surface tablet'],
+    'monitor': ['monitor', 'display', 'lcd', 'led monitor'],
+    'printer': ['printer', 'pixma', 'laserjet', 'inkjet', 'imageclass'],
+    'projector': ['projector', 'beamer'],
+    'phone ip': ['ip phone', 'voip', 'desk phone'],
+    'phone cell': ['cell phone', 'mobile phone', 'smartphone', 'iphone', 'galaxy'],
+    'server': ['server', 'rack server', 'blade server'],
+    'network switch': ['switch', 'network switch', 'ethernet switch'],
+    'network router': ['router', 'wireless router'],
+    'webcam': ['webcam', 'camera', 'web camera'],
+    'speakers': ['speakers', 'speaker system', 'audio'],
+    'ups': ['ups', 'uninterruptible power', 'battery backup']
+}
+
+# Priority order for data extraction
+EXTRACTION_FIELDS = ['Description', 'Device Name', 'Model', 'OS', 'CPU']
+
+# Keyword tables compiled once into single-pass matchers (table order is the match priority)
+BRAND_MATCHER = compile_keyword_matcher({brand.title(): keywords for brand, keywords in BRAND_PATTERNS.items()})
+CATEGORY_MATCHER = compile_keyword_matcher({category.title(): keywords for category, keywords in CATEGORY_PATTERNS.items()})
+
+def extract_brand_from_text(text):
+    """Extract brand from text using keyword matching"""
+    return match_text(BRAND_MATCHER, text)
+
+def extract_category_from_text(text):
+    """Extract category from text using keyword matching"""
+    return match_text(CATEGORY_MATCHER, text)
+
+def resolve_from_fields(devices, missing, matcher, extraction_fields=EXTRACTION_FIELDS):
+    """
+    Fill values for the rows flagged in `missing` from the extraction fields, column by column in priority order.
+    Each field is only scanned for rows that are still unresolved.
+    """
+    resolved = np.full(len(devices), "", dtype=object)
+    unresolved = missing.copy()
+
+    for field in extraction_fields:
+        if field not in devices.columns or not unresolved.any():
+            continue
+        rows = np.flatnonzero(unresolved)
+        extracted = match_series(matcher, devices[field].iloc[rows])
+        found = extracted != ""
+        resolved[rows[found]] = extracted[found]
+        unresolved[rows[found]] = False
+
+    return resolved
+
+def recover_missing_fields(devices, extraction_fields=EXTRACTION_FIELDS):
+    """
+    Attempt to recover missing brand/category for all candidate devices at once.
+    Returns (devices with recovered Brand/Category filled in, mask of fully corrected devices, correction_stats).
+    """
+    recovered = devices.copy()
+    brand_missing = is_blank(devices['Brand'])
+    category_missing = is_blank(devices['Category'])
+
+    recovered_brands = resolve_from_fields(devices, brand_missing, BRAND_MATCHER, extraction_fields)
+    recovered_categories = resolve_from_fields(devices, category_missing, CATEGORY_MATCHER, extraction_fields)
+
+    brand_recovered = brand_missing & (recovered_brands != "")
+    category_recovered = category_missing & (recovered_categories != "")
+
+    # Update the device records (plain object columns so new values can be written)
+    recovered['Brand'] = recovered['Brand'].astype(object)
+    recovered['Category'] = recovered['Category'].astype(object)
+    recovered.loc[brand_recovered, 'Brand'] = recovered_brands[brand_recovered]
+    recovered.loc[category_recovered, 'Category'] = recovered_categories[category_recovered]
+
+    # Track recovery statistics
+    correction_stats = {
+        'brand_recovered': int((brand_recovered & ~category_recovered).sum()),
+        'category_recovered': int((category_recovered & ~brand_recovered).sum()),
+        'both_recovered': int((brand_recovered & category_recovered).sum()),
+        'no_recovery': int((~brand_recovered & ~category_recovered).sum())
+    }
+
+    # Device is now fully valid when it has brand AND category
+    fully_corrected = ~is_blank(recovered['Brand']) & ~is_blank(recovered['Category'])
+
+    return recovered, fully_corrected, correction_stats
@@ -1,156 +1,82 @@
+import argparse
+import os
 import pandas as pd
 import numpy as np
-import openpyxl
-from openpyxl.styles import PatternFill, Font, Alignment
+from purchase_date_validator import resolve_as_of, parse_purchase_dates, calculate_age_years
+from frame_sidecar import read_sidecar_frame, sidecar_dir
+from excel_report_writer import write_styled_workbook
+from risk_model import load_risk_model, apply_risk_scores
+from risk_rollup import ROLLUP_SHEETS, build_risk_cube, rollup_sheet
+from risk_forecast import DEFAULT_FORECAST_QUARTERS, build_risk_forecast
+from risk_ranking import DEFAULT_TOP_K, DEFAULT_GROUP_TOP_K, top_k, top_k_by_group, add_priority_rank
+from inventory_store import RISK_TABLE, write_store
+from pipeline_instrumentation import start_run, start_stage, end_stage, finish_run, write_run_report, format_stage_table
 
-def apply_sheet_formatting(workbook, sheet_name, header_color, data_color=None):
-    """Apply color formatting to Excel sheets with improved error handling"""
-    try:
-        if sheet_name not in workbook.sheetnames:
-            print(f"  ⚠️  Sheet '{sheet_name}' not found in workbook")
-            return False
-        
-        ws = workbook[sheet_name]
-        print(f"  🎨 Formatting sheet '{sheet_name}' with {ws.max_row} rows and {ws.max_column} columns")
-        
-        # Ensure we have valid hex colors (remove # if present and ensure 6 digits)
-        if header_color.startswith('#'):
-            header_color = header_color[1:]
-        if len(header_color) != 6:
-            print(f"  ⚠️  Invalid header color: {header_color}, using default")
-            header_color = "366092"
-            
-        if data_color:
-            if data_color.startswith('#'):
-                data_color = data_color[1:]
-            if len(data_color) != 6:
-                print(f"  ⚠️  Invalid data color: {data_color}, using default")
-                data_color = "D9E2F3"
-        
-        # Define color fills
-        header_fill = PatternFill(start_color=header_color, end_color=header_color, fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF")
-        center_alignment = Alignment(horizontal="center", vertical="center")
-        
-        # Apply header formatting (first row)
-        if ws.max_row > 0:
-            for cell in ws[1]:
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = center_alignment
-        
-        # Apply alternating row colors if data_color is provided
-        if data_color and ws.max_row > 1:
-            data_fill = PatternFill(start_color=data_color, end_color=data_color, fill_type="solid")
-            for row_num in range(2, ws.max_row + 1, 2):  # Every other row starting from row 2
-                for cell in ws[row_num]:
-                    cell.fill = data_fill
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)  # Cap at 50 characters
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
-        return True
-        
-    except Exception as e:
-        print(f"  ❌ Error formatting sheet '{sheet_name}': {e}")
-        return False
+# Header / banded-row colors for risk levels and analysis sheets
+RISK_SHEET_COLORS = {
+    'Complete_Risk_Analysis': ('2C3E50', 'EBF5FB'),      # Dark Blue - Primary Analysis
+    'Risk_Summary_Dashboard': ('8E44AD', 'E8DAEF'),      # Purple - Executive Summary
+    'Brand_Risk_Analysis': ('D68910', 'FEF9E7'),         # Orange - Brand Analysis
+    'Category_Risk_Analysis': ('148F77', 'E8F8F5'),      # Teal - Category Analysis
+    'Age_Distribution_Analysis': ('5B2C6F', 'F4ECF7'),   # Deep Purple - Age Analysis
+    'HIGH_RISK_Devices': ('C0392B', 'F5B7B1'),          # Bright Red - Critical
+    'MEDIUM_RISK_Devices': ('F39C12', 'FCF3CF'),        # Yellow/Orange - Caution  
+    'LOW_RISK_Devices': ('27AE60', 'D5F4E6'),           # Green - Safe
+    'Site_Risk_Rollup': ('1F618D', 'D6EAF8'),           # Blue - Rollups
+    'Location_Risk_Rollup': ('1F618D', 'D6EAF8'),
+    'District_Risk_Rollup': ('1F618D', 'D6EAF8'),
+    'Assignee_Risk_Rollup': ('1F618D', 'D6EAF8'),
+    'Site_Category_Risk_Rollup': ('1F618D', 'D6EAF8'),
+    'Risk_Forecast_Quarterly': ('117864', 'D1F2EB'),    # Dark Green - Forecast
+    'Forecast_By_Category': ('117864', 'D1F2EB'),
+    'Forecast_By_Site': ('117864', 'D1F2EB'),
+    'Device_Risk_Trajectory': ('117864', 'D1F2EB'),
+    'Top_Priority_Devices': ('922B21', 'FADBD8'),       # Dark Red - Priority lists
+    'Top_Priority_By_Site': ('922B21', 'FADBD8'),
+    'Top_Priority_By_Category': ('922B21', 'FADBD8')
+}
 
-def calculate_device_age_risk(age_years):
-    """
-    Calculate risk score based on device age (Most Important - 50 points max)
-    Based on the flowchart: 5+ yrs = High Risk, 3-5 yrs = Medium Risk, <3 yrs = Low Risk
-    """
-    if pd.isna(age_years):
-        return 0, 'Unknown Age'
-    
-    if age_years >= 5:
-        return 50, 'High Risk (5+ years old)'
-    elif age_years >= 3:
-        return 25, 'Medium Risk (3-5 years old)'
-    else:
-        return 5, 'Low Risk (<3 years old)'
+# Columns of the Brand / Category risk sheets
+BRAND_CATEGORY_METRICS = ['Device_Count', 'Avg_Risk_Score', 'Max_Risk_Score', 'Avg_Age_Years', 'High_Risk_Count']
 
-def calculate_brand_risk(brand):
-    """
-    Calculate risk score based on brand reliability/support (Important - 30 points max)
-    Tier 1: Enterprise brands with excellent support
-    Tier 2: Consumer brands with good support  
-    Tier 3: Lesser known or discontinued brands
-    """
-    if pd.isna(brand) or str(brand).strip() == '':
-        return 30, 'High Risk (Unknown Brand)'
-    
-    # Convert to lowercase for comparison (since brands are now title case in data)
-    brand_str = str(brand).lower().strip()
-    
-    # Tier 1: Enterprise/Premium brands (Low Risk)
-    tier1_brands = ['hp', 'dell', 'lenovo', 'apple', 'microsoft', 'cisco', 'canon', 
-                    'fujitsu', 'lg', 'samsung', 'sony', 'xerox', 'epson']
-    
-    # Tier 2: Reliable consumer brands (Medium Risk)
-    tier2_brands = ['acer', 'asus', 'logitech', 'netgear', 'linksys', 'viewsonic', 
-                    'optoma', 'western digital', 'wd', 'seagate', 'nikon', 'olympus']
-    
-    # Check brand tier
-    if any(tier1 in brand_str for tier1 in tier1_brands):
-        return 5, 'Low Risk (Premium Brand)'
-    elif any(tier2 in brand_str for tier2 in tier2_brands):
-        return 15, 'Medium Risk (Consumer Brand)'
-    else:
-        return 25, 'High Risk (Lesser Known Brand)'
+def load_analysis_ready_data(input_excel_path):
+    """Analysis_Ready_Data from the analyzer's Parquet sidecar (no Excel parse, dtypes kept), else from the sheet"""
+    df = read_sidecar_frame(input_excel_path, 'Analysis_Ready_Data')
+    if df is None:
+        return pd.read_excel(input_excel_path, sheet_name='Analysis_Ready_Data')
+    print(f"⚡ Loaded Analysis_Ready_Data from Parquet sidecar in {sidecar_dir(input_excel_path)}")
+    # Scoring and the summaries group on plain labels, same as the sheet would give
+    for col in df.columns[df.dtypes == 'category']:
+        df[col] = df[col].astype(object)
+    return df
 
-def calculate_category_risk(category):
-    """
-    Calculate risk score based on device category criticality (Moderate - 20 points max)
-    Critical: Servers, network equipment, medical devices
-    Important: Desktops, laptops, printers, monitors
-    Standard: Accessories, mobile devices, misc equipment
-    """
-    if pd.isna(category) or str(category).strip() == '':
-        return 20, 'High Risk (Unknown Category)'
-    
-    # Convert to lowercase for comparison (since categories are now title case in data)
-    category_str = str(category).lower().strip()
-    
-    # Critical infrastructure devices (High Risk if old)
-    critical_categories = ['server', 'network firewall', 'network router', 'network switch', 
-                          'network wap', 'defibrillator', 'ups']
-    
-    # Important business devices (Medium Risk)
-    important_categories = ['desktop', 'laptop', 'printer', 'monitor', 'projector', 
-                           'phone ip', 'timeclock']
-    
-    # Standard/accessory devices (Low Risk)
-    standard_categories = ['tablet', 'phone cell', 'phone bluetooth', 'webcam', 'speakers', 
-                          'camera', 'camcorder', 'charger', 'computer accessory', 
-                          'phone accessory', 'docking station']
-    
-    if any(critical in category_str for critical in critical_categories):
-        return 20, 'High Risk (Critical Infrastructure)'
-    elif any(important in category_str for important in important_categories):
-        return 10, 'Medium Risk (Business Essential)'
-    elif any(standard in category_str for standard in standard_categories):
-        return 3, 'Low Risk (Standard Equipment)'
-    else:
-        return 15, 'Medium Risk (Unclassified Category)'
-
-def analyze_device_lifecycle_risk(input_excel_path, output_excel_path):
+def analyze_device_lifecycle_risk(input_excel_path, output_excel_path, as_of=None,
+                                  report_path=None, show_timings=False, trace_memory=False, risk_model=None,
+                                  forecast_quarters=None, full_sort_sheets=True, priority_top_k=DEFAULT_TOP_K,
+                                  group_top_k=DEFAULT_GROUP_TOP_K, store_path=None):
     """
     Analyze device lifecycle management risk using the Fully_Valid_Data sheet
+    as_of: date that device ages are measured against (defaults to now)
+    report_path: where the JSON run report is written (defaults to <output name>_run_report.json)
+    show_timings: also print the per-stage summary table; trace_memory: per-stage tracemalloc peaks
+    risk_model: weights, age thresholds and level cutoffs (defaults to risk_model.json, see risk_model.py)
+    forecast_quarters: also project each device's risk over this many quarters (e.g. 20 = five years)
+                       and add the forecast sheets
+    full_sort_sheets: write Complete_Risk_Analysis sorted by score plus the sorted HIGH/MEDIUM/LOW sheets
+                      and a Priority_Rank for every device; False writes Complete_Risk_Analysis unsorted and
+                      only the priority lists, skipping the full sorts
+    priority_top_k / group_top_k: devices kept per risk level / per Site and Category in the priority lists
+    store_path: also load the scored devices into this SQLite inventory store for indexed lookups
+                such as all high-risk laptops at one site (see inventory_store.py)
+    Returns the run report.
     """
+    as_of = resolve_as_of(as_of)
+    risk_model = risk_model or load_risk_model()
+    run_report = start_run('device_lifecycle_risk_analyzer', trace_memory=trace_memory)
     try:
-        # Read the Fully_Valid_Data sheet
-        df = pd.read_excel(input_excel_path, sheet_name='Analysis_Ready_Data')
+        stage = start_stage(run_report, 'load')
+        df = load_analysis_ready_data(input_excel_path)
+        end_stage(run_report, stage, rows_out=len(df))
         print(f"Successfully loaded {len(df)} fully valid devices for DLM risk analysis")
         
         # Print available columns for debugging
@@ -169,11 +95,12 @@ def analyze_device_lifecycle_risk(input_excel_path, output_excel_path):
     print("\n=== CALCULATING DEVICE AGES ===")
     try:
         # Convert Purchase Date to datetime
-        df['Purchase_Date_Parsed'] = pd.to_datetime(df['Purchase Date'], errors='coerce')
+        stage = start_stage(run_report, 'device_age', rows_in=len(df))
+        df['Purchase_Date_Parsed'] = parse_purchase_dates(df['Purchase Date'])
         
-        # Calculate age in years
-        current_date = pd.Timestamp.now()
-        df['Device_Age_Years'] = (current_date - df['Purchase_Date_Parsed']).dt.days / 365.25
+        # Calculate age in years (relative to the run's as-of date)
+        df['Device_Age_Years'] = calculate_age_years(df['Purchase_Date_Parsed'], as_of=as_of)
+        end_stage(run_report, stage, rows_out=int(df['Device_Age_Years'].notna().sum()))
         
         print(f"✅ Successfully calculated device ages")
         print(f"   Age range: {df['Device_Age_Years'].min():.1f} to {df['Device_Age_Years'].max():.1f} years")
@@ -185,43 +112,33 @@ def analyze_device_lifecycle_risk(input_excel_path, output_excel_path):
     
     # Calculate risk scores for each factor
     print("\n=== CALCULATING DEVICE LIFECYCLE RISK SCORES ===")
+    stage = start_stage(run_report, 'risk_scoring', rows_in=len(df))
     
-    # Age Risk (50 points max - Most Important)
-    age_risk_results = df['Device_Age_Years'].apply(calculate_device_age_risk)
-    df['Age_Risk_Score'] = [result[0] for result in age_risk_results]
-    df['Age_Risk_Reason'] = [result[1] for result in age_risk_results]
-    
-    # Brand Risk (30 points max - Important)
-    brand_risk_results = df['Brand'].apply(calculate_brand_risk)
-    df['Brand_Risk_Score'] = [result[0] for result in brand_risk_results]
-    df['Brand_Risk_Reason'] = [result[1] for result in brand_risk_results]
-    
-    # Category Risk (20 points max - Moderate)
-    category_risk_results = df['Category'].apply(calculate_category_risk)
-    df['Category_Risk_Score'] = [result[0] for result in category_risk_results]
-    df['Category_Risk_Reason'] = [result[1] for result in category_risk_results]
-    
-    # Calculate Total Risk Score (0-100 scale)
-    df['Total_Risk_Score'] = df['Age_Risk_Score'] + df['Brand_Risk_Score'] + df['Category_Risk_Score']
-    
-    # Classify overall risk level
-    def classify_risk_level(score):
-        if score >= 70:
-            return 'HIGH RISK'
-        elif score >= 35:
-            return 'MEDIUM RISK'
-        else:
-            return 'LOW RISK'
-    
-    df['Risk_Level'] = df['Total_Risk_Score'].apply(classify_risk_level)
-    
-    # Add priority ranking within each risk level (by total score)
-    df['Priority_Rank'] = df.groupby('Risk_Level')['Total_Risk_Score'].rank(method='dense', ascending=False).astype(int)
+    # Age, brand and category risk, total score and risk level under the configured model
+    df = apply_risk_scores(df, risk_model)
     
     # Separate devices by risk level
-    high_risk = df[df['Risk_Level'] == 'HIGH RISK'].sort_values('Total_Risk_Score', ascending=False)
-    medium_risk = df[df['Risk_Level'] == 'MEDIUM RISK'].sort_values('Total_Risk_Score', ascending=False)
-    low_risk = df[df['Risk_Level'] == 'LOW RISK'].sort_values('Total_Risk_Score', ascending=False)
+    high_risk = df[df['Risk_Level'] == 'HIGH RISK']
+    medium_risk = df[df['Risk_Level'] == 'MEDIUM RISK']
+    low_risk = df[df['Risk_Level'] == 'LOW RISK']
+    end_stage(run_report, stage, rows_out=len(df))
+    
+    # Priority lists by partial selection: top K per risk level and per Site / Category, no full sort
+    stage = start_stage(run_report, 'priority_ranking', rows_in=len(df))
+    priority_devices = add_priority_rank(pd.concat([top_k(level_devices, priority_top_k)
+                                                    for level_devices in (high_risk, medium_risk, low_risk)]))
+    priority_sheets = [('Top_Priority_Devices', priority_devices)]
+    for sheet_name, dim in [('Top_Priority_By_Site', 'Site'), ('Top_Priority_By_Category', 'Category')]:
+        if dim in df.columns:
+            priority_sheets.append((sheet_name, top_k_by_group(df, group_top_k, [dim])))
+    
+    if full_sort_sheets:
+        # Add priority ranking within each risk level (by total score)
+        df['Priority_Rank'] = df.groupby('Risk_Level')['Total_Risk_Score'].rank(method='dense', ascending=False).astype(int)
+        high_risk = df[df['Risk_Level'] == 'HIGH RISK'].sort_values('Total_Risk_Score', ascending=False)
+        medium_risk = df[df['Risk_Level'] == 'MEDIUM RISK'].sort_values('Total_Risk_Score', ascending=False)
+        low_risk = df[df['Risk_Level'] == 'LOW RISK'].sort_values('Total_Risk_Score', ascending=False)
+    end_stage(run_report, stage, rows_out=sum(len(sheet_df) for _, sheet_df in priority_sheets))
     
     # Display results
     print(f"\n=== DEVICE LIFECYCLE MANAGEMENT RISK ANALYSIS RESULTS ===")
@@ -237,7 +154,7 @@ def analyze_device_lifecycle_risk(input_excel_path, output_excel_path):
                        'Device_Age_Years', 'Total_Risk_Score', 'Age_Risk_Reason']
         # Only include columns that actually exist
         available_cols = [col for col in display_cols if col in df.columns]
-        top_high_risk = high_risk.head(5)[available_cols]
+        top_high_risk = priority_devices[priority_devices['Risk_Level'] == 'HIGH RISK'].head(5)[available_cols]
         
         for idx, device in top_high_risk.iterrows():
             device_id = device.get('Asset Tag ID', f"Row {idx}")
@@ -275,23 +192,18 @@ def analyze_device_lifecycle_risk(input_excel_path, output_excel_path):
     # Create additional analysis data first
     print("\n📊 Creating detailed analysis summaries...")
     
-    # Most risky brands analysis
-    brand_risk_analysis = df.groupby('Brand').agg({
-        'Total_Risk_Score': ['count', 'mean', 'max'],
-        'Device_Age_Years': 'mean',
-        'Risk_Level': lambda x: (x == 'HIGH RISK').sum()
-    }).round(1)
-    brand_risk_analysis.columns = ['Device_Count', 'Avg_Risk_Score', 'Max_Risk_Score', 'Avg_Age_Years', 'High_Risk_Count']
-    brand_risk_analysis = brand_risk_analysis.sort_values('Avg_Risk_Score', ascending=False).reset_index()
+    # Risk rollup cube: one grouped pass over the dimension keys; every summary sheet reads from it
+    stage = start_stage(run_report, 'aggregations', rows_in=len(df))
+    risk_cube = build_risk_cube(df)
     
-    # Most risky categories analysis
-    category_risk_analysis = df.groupby('Category').agg({
-        'Total_Risk_Score': ['count', 'mean', 'max'],
-        'Device_Age_Years': 'mean',
-        'Risk_Level': lambda x: (x == 'HIGH RISK').sum()
-    }).round(1)
-    category_risk_analysis.columns = ['Device_Count', 'Avg_Risk_Score', 'Max_Risk_Score', 'Avg_Age_Years', 'High_Risk_Count']
-    category_risk_analysis = category_risk_analysis.sort_values('Avg_Risk_Score', ascending=False).reset_index()
+    # Most risky brands and categories
+    brand_risk_analysis = rollup_sheet(risk_cube, ['Brand'], BRAND_CATEGORY_METRICS)
+    category_risk_analysis = rollup_sheet(risk_cube, ['Category'], BRAND_CATEGORY_METRICS)
+    
+    # Site / location / district / assignee rollups (dimensions missing from the data are skipped)
+    rollup_sheets = [(sheet_name, rollup_sheet(risk_cube, dimensions))
+                     for sheet_name, dimensions in ROLLUP_SHEETS.items()
+                     if all(dim in risk_cube['dimensions'] for dim in dimensions)]
     
     # Age distribution analysis
     age_distribution = pd.DataFrame({
@@ -306,6 +218,7 @@ def analyze_device_lifecycle_risk(input_excel_path, output_excel_path):
     })
     age_distribution['Percentage'] = (age_distribution['Device_Count'] / len(df) * 100).round(1)
     age_distribution['Risk_Assessment'] = ['Low Risk', 'Medium Risk', 'High Risk', 'Very High Risk', 'Critical Risk']
+    end_stage(run_report, stage, rows_out=len(risk_cube['cells']))
 
     # Age distribution analysis for high-risk devices
     if len(high_risk) > 0:
@@ -335,83 +248,80 @@ def analyze_device_lifecycle_risk(input_excel_path, output_excel_path):
         print(f"  {cat_data['Category']}: Avg Risk {cat_data['Avg_Risk_Score']:.1f} " +
               f"({cat_data['Device_Count']} devices, {cat_data['High_Risk_Count']} high-risk)")
     
+    # Display riskiest sites (from the cube's site rollup)
+    site_rollup = dict(rollup_sheets).get('Site_Risk_Rollup')
+    if site_rollup is not None:
+        print(f"\n🏫 RISK BY SITE (by average risk score):")
+        for idx, site_data in site_rollup.head(5).iterrows():
+            print(f"  {site_data['Site']}: Avg Risk {site_data['Avg_Risk_Score']:.1f} " +
+                  f"({site_data['Device_Count']} devices, {site_data['High_Risk_Count']} high-risk)")
+    
+    # Forward-looking forecast: projected risk level per device and quarter, replacement cost when due
+    forecast_sheets = {}
+    if forecast_quarters:
+        stage = start_stage(run_report, 'risk_forecast', rows_in=len(df))
+        forecast_sheets = build_risk_forecast(df, as_of, forecast_quarters, risk_model)
+        end_stage(run_report, stage, rows_out=len(df) * forecast_quarters)
+        
+        print(f"\n🔮 REPLACEMENT FORECAST (next {forecast_quarters} quarters):")
+        for idx, quarter in forecast_sheets['Risk_Forecast_Quarterly'].head(8).iterrows():
+            print(f"  {quarter['Quarter']}: {quarter['Projected_High_Risk']} high-risk, "
+                  f"{quarter['Newly_High_Risk']} newly due - ${quarter['Replacement_Cost']:,.2f}")
+    
     # Display age distribution insights
     print(f"\n📅 DEVICE AGE DISTRIBUTION:")
     for idx, age_data in age_distribution.iterrows():
         print(f"  {age_data['Age_Range']}: {age_data['Device_Count']} devices " +
               f"({age_data['Percentage']:.1f}%) - {age_data['Risk_Assessment']}")
     
-    # Save results to Excel
+    # Save results to Excel in a single styled pass (no reload for formatting)
     try:
-        with pd.ExcelWriter(output_excel_path, engine='openpyxl') as writer:
+        risk_sheets = [
             # 1. Complete Risk Analysis - MOVED TO FIRST POSITION
-            df.sort_values('Total_Risk_Score', ascending=False).to_excel(
-                writer, sheet_name='Complete_Risk_Analysis', index=False)
-            
+            ('Complete_Risk_Analysis', df.sort_values('Total_Risk_Score', ascending=False) if full_sort_sheets else df),
             # 2. Risk Summary Dashboard
-            pd.DataFrame(risk_summary).to_excel(writer, sheet_name='Risk_Summary_Dashboard', index=False)
-            
+            ('Risk_Summary_Dashboard', pd.DataFrame(risk_summary)),
             # 3. Brand Risk Analysis
-            brand_risk_analysis.to_excel(writer, sheet_name='Brand_Risk_Analysis', index=False)
-            
-            # 4. Category Risk Analysis  
-            category_risk_analysis.to_excel(writer, sheet_name='Category_Risk_Analysis', index=False)
-            
+            ('Brand_Risk_Analysis', brand_risk_analysis),
+            # 4. Category Risk Analysis
+            ('Category_Risk_Analysis', category_risk_analysis),
             # 5. Age Distribution Analysis
-            age_distribution.to_excel(writer, sheet_name='Age_Distribution_Analysis', index=False)
-            
+            ('Age_Distribution_Analysis', age_distribution)
+        ]
+        
+        if full_sort_sheets:
             # 6. High Risk Devices (RED)
             if len(high_risk) > 0:
-                high_risk.to_excel(writer, sheet_name='HIGH_RISK_Devices', index=False)
+                risk_sheets.append(('HIGH_RISK_Devices', high_risk))
             
-            # 7. Medium Risk Devices (YELLOW)  
+            # 7. Medium Risk Devices (YELLOW)
             if len(medium_risk) > 0:
-                medium_risk.to_excel(writer, sheet_name='MEDIUM_RISK_Devices', index=False)
+                risk_sheets.append(('MEDIUM_RISK_Devices', medium_risk))
             
             # 8. Low Risk Devices (GREEN)
             if len(low_risk) > 0:
-                low_risk.to_excel(writer, sheet_name='LOW_RISK_Devices', index=False)
+                risk_sheets.append(('LOW_RISK_Devices', low_risk))
         
-        # Apply color formatting
-        print("\n🎨 Applying color formatting to DLM risk analysis...")
+        # Top-K priority lists per risk level and per Site / Category
+        risk_sheets.extend(priority_sheets)
         
-        try:
-            workbook = openpyxl.load_workbook(output_excel_path)
-            print(f"📂 Loaded workbook with sheets: {workbook.sheetnames}")
-            
-            # Color scheme for risk levels and analysis sheets
-            sheet_colors = {
-                'Complete_Risk_Analysis': ('2C3E50', 'EBF5FB'),      # Dark Blue - Primary Analysis
-                'Risk_Summary_Dashboard': ('8E44AD', 'E8DAEF'),      # Purple - Executive Summary
-                'Brand_Risk_Analysis': ('D68910', 'FEF9E7'),         # Orange - Brand Analysis
-                'Category_Risk_Analysis': ('148F77', 'E8F8F5'),      # Teal - Category Analysis
-                'Age_Distribution_Analysis': ('5B2C6F', 'F4ECF7'),   # Deep Purple - Age Analysis
-                'HIGH_RISK_Devices': ('C0392B', 'F5B7B1'),          # Bright Red - Critical
-                'MEDIUM_RISK_Devices': ('F39C12', 'FCF3CF'),        # Yellow/Orange - Caution  
-                'LOW_RISK_Devices': ('27AE60', 'D5F4E6')            # Green - Safe
-            }
-            
-            # Apply formatting to each sheet
-            sheets_formatted = 0
-            for sheet_name, (header_color, data_color) in sheet_colors.items():
-                if sheet_name in workbook.sheetnames:
-                    success = apply_sheet_formatting(workbook, sheet_name, header_color, data_color)
-                    if success:
-                        sheets_formatted += 1
-                        print(f"  ✅ Formatted {sheet_name}")
-                    else:
-                        print(f"  ❌ Failed to format {sheet_name}")
-                else:
-                    print(f"  ⚠️  Sheet {sheet_name} not found")
-            
-            workbook.save(output_excel_path)
-            workbook.close()
-            print(f"🎨 Applied color formatting to {sheets_formatted} sheets!")
-            print(f"💾 Saved formatted workbook to: {output_excel_path}")
-            
-        except Exception as e:
-            print(f"❌ Error during color formatting: {e}")
-            print("📄 Excel file was saved without color formatting")
+        # 9+. Site / location / district / assignee rollups from the risk cube
+        risk_sheets.extend(rollup_sheets)
+        
+        # Forecast sheets (only when a forecast was requested)
+        risk_sheets.extend(forecast_sheets.items())
+        
+        print("\n🎨 Writing formatted DLM risk analysis workbook...")
+        styled_sheets = [(sheet_name, sheet_df) + RISK_SHEET_COLORS[sheet_name] for sheet_name, sheet_df in risk_sheets]
+        sheets_written = write_styled_workbook(output_excel_path, styled_sheets, report=run_report)
+        print(f"💾 Saved formatted workbook with {sheets_written} sheets to: {output_excel_path}")
+
+        # Indexed SQLite copy of the scored devices for quick lookups (optional)
+        if store_path:
+            stage = start_stage(run_report, 'sqlite_store', rows_in=len(df))
+            loaded = write_store(store_path, {RISK_TABLE: df})
+            end_stage(run_report, stage, rows_out=loaded[RISK_TABLE])
+            print(f"🗄️  Loaded {loaded[RISK_TABLE]} scored devices into the inventory store {store_path}")
         
         print(f"\n✅ Device Lifecycle Management risk analysis saved to: {output_excel_path}")
         print(f"\n📊 EXECUTIVE SUMMARY:")
@@ -421,8 +331,17 @@ def analyze_device_lifecycle_risk(input_excel_path, output_excel_path):
         
     except Exception as e:
         print(f"\nError saving DLM risk analysis: {e}")
+    
+    # Per-stage timing / memory report for this run
+    finish_run(run_report)
+    report_path = report_path or os.path.splitext(output_excel_path)[0] + '_run_report.json'
+    write_run_report(run_report, report_path)
+    print(f"⏱️  Run report saved to {report_path} ({run_report['wall_seconds']:.1f}s total)")
+    if show_timings:
+        print(format_stage_table(run_report))
+    return run_report
 
-def main():
+def main(forecast_quarters=None):
     # File paths
     input_file = r'C:\Users\AbrehamMesfin\OneDrive - Greater KC LINC, Inc\Documents\VS code API project\device_analysis_with_categories.xlsx'
     output_file = r'C:\Users\AbrehamMesfin\OneDrive - Greater KC LINC, Inc\Documents\VS code API project\device_lifecycle_risk_analysis.xlsx'
@@ -431,13 +350,22 @@ def main():
     print("=" * 60)
     print("This tool analyzes devices from the 'Fully_Valid_Data' sheet and")
     print("creates a risk-based classification for lifecycle management.")
-    print("\n📋 Risk Scoring System:")
-    print("   🕐 Device Age (50 points max): 5+ years = High, 3-5 years = Medium, <3 years = Low")
-    print("   🏷️  Brand Reliability (30 points max): Enterprise > Consumer > Unknown")
-    print("   📂 Device Category (20 points max): Critical > Business > Standard")
-    print("   📊 Total Risk: 70+ = HIGH, 35-69 = MEDIUM, <35 = LOW")
-    
-    analyze_device_lifecycle_risk(input_file, output_file)
+    risk_model = load_risk_model()
+    weights, ages, cutoffs = risk_model['weights'], risk_model['age_thresholds_years'], risk_model['level_cutoffs']
+    print("\n📋 Risk Scoring System (risk_model.json):")
+    print(f"   🕐 Device Age ({weights['age']:g} points max): {ages['high']:g}+ years = High, "
+          f"{ages['medium']:g}-{ages['high']:g} years = Medium, <{ages['medium']:g} years = Low")
+    print(f"   🏷️  Brand Reliability ({weights['brand']:g} points max): Enterprise > Consumer > Unknown")
+    print(f"   📂 Device Category ({weights['category']:g} points max): Critical > Business > Standard")
+    print(f"   📊 Total Risk: {cutoffs['high']:g}+ = HIGH, {cutoffs['medium']:g}-{cutoffs['high']:g} = MEDIUM, "
+          f"<{cutoffs['medium']:g} = LOW")
+    
+    analyze_device_lifecycle_risk(input_file, output_file, risk_model=risk_model,
+                                  forecast_quarters=forecast_quarters)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='DLM risk analyzer')
+    parser.add_argument('--forecast', type=int, nargs='?', const=DEFAULT_FORECAST_QUARTERS, default=None,
+                        metavar='QUARTERS',
+                        help=f'add the replacement forecast sheets over QUARTERS quarters (default {DEFAULT_FORECAST_QUARTERS})')
+    main(forecast_quarters=parser.parse_args().forecast)
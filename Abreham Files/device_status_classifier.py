@@ -0,0 +1,65 @@
+import pandas as pd
+import numpy as np
+
+# Active/Available statuses (Green - devices in use or ready for use)
+ACTIVE_STATUSES = [
+    'available', 'check out', 'checked out', 'check in', 'checked in',
+    'under repair', 'found', 'reserved'
+]
+
+# Inactive/Unavailable statuses (Red - devices no longer in active inventory)
+INACTIVE_STATUSES = [
+    'broken', 'lost/missing', 'lost', 'missing', 'donate', 'donated',
+    'dispose', 'disposed', 'sold'
+]
+
+STATUS_CLASSES = ['ACTIVE', 'INACTIVE', 'UNKNOWN']
+
+def classify_status_value(status):
+    """Classify one raw status value into (status class, display label)"""
+    if pd.isna(status):
+        # Missing statuses keep the plain 'Unknown' label and no status class
+        return None, "Unknown"
+    raw_status = str(status).strip()
+    status_str = raw_status.lower()
+
+    # Check for active statuses
+    for active in ACTIVE_STATUSES:
+        if active in status_str:
+            return 'ACTIVE', f"ACTIVE ({raw_status})"
+
+    # Check for inactive statuses
+    for inactive in INACTIVE_STATUSES:
+        if inactive in status_str:
+            return 'INACTIVE', f"INACTIVE ({raw_status})"
+
+    # Unknown status
+    return 'UNKNOWN', f"UNKNOWN ({raw_status})"
+
+def classify_statuses(status_series):
+    """
+    Classify a whole Status column by evaluating each distinct raw status once.
+    Returns (Status_Class, Status_Normalized) as categoricals aligned to the input index.
+    """
+    codes, uniques = pd.factorize(status_series, use_na_sentinel=True)
+
+    # Classify the handful of distinct values, with one extra slot for missing statuses
+    unique_results = [classify_status_value(value) for value in uniques]
+    unique_results.append(classify_status_value(None))
+    classes = np.array([result[0] for result in unique_results], dtype=object)
+    labels = np.array([result[1] for result in unique_results], dtype=object)
+
+    # Broadcast back to every row (code -1 picks the missing-status slot)
+    status_class = pd.Series(
+        pd.Categorical(classes[codes], categories=STATUS_CLASSES),
+        index=status_series.index, name='Status_Class'
+    )
+    status_label = pd.Series(
+        pd.Categorical(labels[codes]),
+        index=status_series.index, name='Status_Normalized'
+    )
+    return status_class, status_label
+
+def get_status_masks(status_class):
+    """Boolean ACTIVE/INACTIVE/UNKNOWN masks for a Status_Class series"""
+    return {status: (status_class == status) for status in STATUS_CLASSES}
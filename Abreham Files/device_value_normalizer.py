@@ -0,0 +1,75 @@
+import os
+import json
+import pandas as pd
+
+# Replacement tables live in a JSON file next to this script so spelling fixes don't need code edits
+NORMALIZATION_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'normalization_rules.json')
+
+# Built-in tables, used when the rules file is missing or doesn't define a table
+DEFAULT_BRAND_REPLACEMENTS = {
+    'epsson': 'epson',
+    'tripplite': 'tripp lite',
+    'hewlett packard': 'hp'
+}
+
+DEFAULT_CATEGORY_REPLACEMENTS = {
+    'defibulator': 'defibrillator',  # Fix spelling
+    'pc desktop': 'desktop',
+    'pc laptop': 'laptop'
+}
+
+def load_replacement_tables(rules_path=NORMALIZATION_RULES_PATH):
+    """
+    Load the brand and category replacement tables from the rules file.
+    Returns (brand_replacements, category_replacements), falling back to the built-in tables.
+    """
+    brand_replacements = dict(DEFAULT_BRAND_REPLACEMENTS)
+    category_replacements = dict(DEFAULT_CATEGORY_REPLACEMENTS)
+
+    if rules_path and os.path.exists(rules_path):
+        try:
+            with open(rules_path, 'r', encoding='utf-8') as rules_file:
+                rules = json.load(rules_file)
+            if 'brand_replacements' in rules:
+                brand_replacements = {str(k).strip().lower(): str(v).strip().lower() for k, v in rules['brand_replacements'].items()}
+            if 'category_replacements' in rules:
+                category_replacements = {str(k).strip().lower(): str(v).strip().lower() for k, v in rules['category_replacements'].items()}
+        except Exception as e:
+            print(f"  ⚠️  Could not read normalization rules from {rules_path}: {e}")
+            print("  Using built-in replacement tables")
+
+    return brand_replacements, category_replacements
+
+def normalize_value(value, replacements):
+    """Normalize a single brand/category value: fix known variations, clean separators, title case"""
+    if pd.isna(value):
+        return ""
+    value_str = str(value).strip().lower()
+    # Apply replacements
+    for old, new in replacements.items():
+        if value_str == old:
+            value_str = new
+    # Clean and format with proper capitalization
+    cleaned_value = value_str.replace('-', ' ').replace('_', ' ')
+    return cleaned_value.title() if cleaned_value else ""
+
+def normalize_column(series, replacements):
+    """
+    Normalize a heavily repeated string column by normalizing each distinct value once.
+    Returns (normalized Categorical series, set of distinct normalized values from non-missing entries).
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+
+    # Normalize only the unique raw values; the extra last slot holds the result for missing values
+    normalized_uniques = [normalize_value(value, replacements) for value in uniques]
+    normalized_uniques.append(normalize_value(None, replacements))
+
+    categories = pd.unique(pd.Series(normalized_uniques, dtype=object))
+    category_codes = pd.Index(categories).get_indexer(normalized_uniques)
+
+    normalized = pd.Series(
+        pd.Categorical.from_codes(category_codes[codes], categories=categories),
+        index=series.index, name=series.name
+    )
+    distinct_values = set(normalized_uniques[:-1])
+    return normalized, distinct_values
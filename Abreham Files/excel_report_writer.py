@@ -0,0 +1,93 @@
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import FormulaRule
+from openpyxl.styles import PatternFill, Font, Alignment
+from openpyxl.utils import get_column_letter
+from pipeline_instrumentation import start_stage, end_stage
+
+DEFAULT_HEADER_COLOR = "366092"
+DEFAULT_DATA_COLOR = "D9E2F3"
+
+# Column widths are capped at 50 characters
+MAX_COLUMN_WIDTH = 50
+
+# Excel sheets hold at most 1,048,576 rows (header included)
+EXCEL_MAX_ROWS = 1048575
+
+def normalize_hex_color(color, default):
+    """Strip a leading # and fall back to the default for anything that isn't 6 hex digits"""
+    if color is None:
+        return None
+    color = color[1:] if color.startswith('#') else color
+    if len(color) != 6:
+        print(f"  ⚠️  Invalid color: {color}, using default")
+        return default
+    return color
+
+def compute_column_widths(df):
+    """Width per column from the longest header or value text (+2 padding, capped), computed on the frame"""
+    widths = []
+    for col in df.columns:
+        values = df[col]
+        longest = values.dropna().astype(str).str.len().max() if values.notna().any() else 0
+        widths.append(min(max(len(str(col)), int(longest)) + 2, MAX_COLUMN_WIDTH))
+    return widths
+
+def excel_rows(df):
+    """Yield plain Python rows for the sheet (missing values as empty cells)"""
+    values = df.astype(object)
+    values = values.where(df.notna(), None)
+    yield from values.itertuples(index=False, name=None)
+
+def write_styled_sheet(workbook, sheet_name, df, header_color=DEFAULT_HEADER_COLOR, data_color=None):
+    """
+    Stream one DataFrame into a write-only workbook with the report styling:
+    colored bold header, banded data rows (one conditional format rule) and precomputed column widths.
+    """
+    ws = workbook.create_sheet(title=sheet_name)
+    header_color = normalize_hex_color(header_color, DEFAULT_HEADER_COLOR)
+    data_color = normalize_hex_color(data_color, DEFAULT_DATA_COLOR)
+
+    # Widths and the banding rule must be set before any rows are streamed
+    for col_idx, width in enumerate(compute_column_widths(df), start=1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = width
+
+    if data_color and len(df) > 0 and len(df.columns) > 0:
+        data_fill = PatternFill(start_color=data_color, end_color=data_color, fill_type="solid")
+        data_range = f"A2:{get_column_letter(len(df.columns))}{len(df) + 1}"
+        ws.conditional_formatting.add(data_range, FormulaRule(formula=['MOD(ROW(),2)=0'], fill=data_fill))
+
+    # Header row (one shared style for every header cell)
+    header_fill = PatternFill(start_color=header_color, end_color=header_color, fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF")
+    center_alignment = Alignment(horizontal="center", vertical="center")
+    header_cells = []
+    for col in df.columns:
+        cell = WriteOnlyCell(ws, value=str(col))
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = center_alignment
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    for row in excel_rows(df):
+        ws.append(row)
+
+    print(f"  🎨 Wrote sheet '{sheet_name}' with {len(df) + 1} rows and {len(df.columns)} columns")
+    return ws
+
+def write_styled_workbook(output_path, sheets, report=None):
+    """
+    Write every report sheet in a single pass - the workbook is never reloaded to be formatted.
+    sheets: list of (sheet name, DataFrame, header color, data color) in workbook order.
+    report: optional run report; each sheet write (styling included) and the final save are timed as stages.
+    """
+    workbook = Workbook(write_only=True)
+    for sheet_name, df, header_color, data_color in sheets:
+        stage = start_stage(report, f"write_sheet:{sheet_name}", rows_in=len(df))
+        write_styled_sheet(workbook, sheet_name, df, header_color, data_color)
+        end_stage(report, stage, rows_out=len(df))
+    stage = start_stage(report, 'save_workbook', rows_in=sum(len(df) for _, df, _, _ in sheets))
+    workbook.save(output_path)
+    end_stage(report, stage)
+    return len(sheets)
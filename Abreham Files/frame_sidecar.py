@@ -0,0 +1,62 @@
+import os
+import pandas as pd
+from inventory_schema import PYARROW_AVAILABLE
+
+# Parquet needs pyarrow; without it no sidecar is written and readers fall back to the workbook
+SIDECAR_AVAILABLE = PYARROW_AVAILABLE
+
+# Key frames the device analyzer hands to the next stage
+SIDECAR_FRAMES = [
+    'Fully_Valid_Data', 'Analysis_Ready_Data', 'All_Invalid_Data',
+    'Enhanced_Fully_Valid_Data', 'Remaining_Invalid_Data'
+]
+
+def sidecar_dir(excel_path):
+    """Folder holding the Parquet copies of a workbook's key sheets (<workbook name>_frames, next to it)"""
+    return os.path.splitext(excel_path)[0] + '_frames'
+
+def sidecar_path(excel_path, frame_name):
+    return os.path.join(sidecar_dir(excel_path), f"{frame_name}.parquet")
+
+def write_sidecar_frames(excel_path, frames):
+    """
+    Save each frame as Parquet next to the workbook so later stages skip the Excel round trip
+    and keep dtypes (dates, categoricals). Empty frames remove any old copy. Returns the names written.
+    """
+    if not SIDECAR_AVAILABLE:
+        print("  ⚠️  pyarrow not installed - skipping Parquet sidecar (readers will use the workbook)")
+        return []
+
+    os.makedirs(sidecar_dir(excel_path), exist_ok=True)
+    written = []
+    for frame_name, frame in frames.items():
+        path = sidecar_path(excel_path, frame_name)
+        if os.path.exists(path):
+            os.remove(path)
+        if frame is None or len(frame) == 0:
+            continue
+        try:
+            frame.reset_index(drop=True).to_parquet(path, index=False)
+            written.append(frame_name)
+        except Exception as e:
+            print(f"  ⚠️  Could not write Parquet sidecar for {frame_name}: {e}")
+            if os.path.exists(path):
+                os.remove(path)
+    return written
+
+def read_sidecar_frame(excel_path, frame_name):
+    """
+    Load one frame from the workbook's Parquet sidecar.
+    Returns None when there is no sidecar copy, it is older than the workbook, or it can't be read.
+    """
+    path = sidecar_path(excel_path, frame_name)
+    if not SIDECAR_AVAILABLE or not os.path.exists(path):
+        return None
+    if os.path.exists(excel_path) and os.path.getmtime(path) < os.path.getmtime(excel_path):
+        print(f"  ⚠️  Parquet sidecar for {frame_name} is older than {excel_path} - ignoring it")
+        return None
+    try:
+        return pd.read_parquet(path)
+    except Exception as e:
+        print(f"  ⚠️  Could not read Parquet sidecar for {frame_name}: {e}")
+        return None
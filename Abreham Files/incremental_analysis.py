@@ -0,0 +1,244 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from data_quality import (MISSING_BRAND, MISSING_CATEGORY, INVALID_PURCHASE_DATE, NOT_ACTIVE, RAW_BRAND_MISSING,
+                          RAW_CATEGORY_MISSING, FULLY_VALID_BITS, ISSUE_BITS, is_blank, new_quality_mask,
+                          flag_check, flag_status_checks, has_any, has_none, mask_counts, build_quality_summary)
+from device_data_recovery import recover_missing_fields
+from device_status_classifier import classify_statuses
+from device_value_normalizer import load_replacement_tables, normalize_column
+from frame_sidecar import SIDECAR_AVAILABLE
+from purchase_date_validator import (resolve_as_of, detect_date_format, parse_purchase_dates,
+                                     classify_purchase_dates, calculate_age_years)
+from risk_model import (BRAND_TIER_NAMES, CATEGORY_TIER_NAMES, RISK_LEVELS, brand_tier, category_tier,
+                        tier_codes, load_risk_model, score_models)
+
+# Bump when the derived fields change meaning, so an old state store is rebuilt instead of reused
+STATE_VERSION = 1
+STATE_FILE = 'device_state.parquet'
+STATE_META_FILE = 'device_state.json'
+
+# Per-device fields kept in the state store. All of them depend only on the device's own row
+# (and the normalization rules), so they stay valid until the row changes. Date status, ages,
+# the quality mask and risk scores depend on the as-of date and are recomputed every run.
+DERIVED_FIELDS = ['Status_Class', 'Status_Normalized', 'Brand_Normalized', 'Category_Normalized',
+                  'Raw_Brand_Missing', 'Raw_Category_Missing', 'Purchase_Date_Parsed',
+                  'Recovered_Brand', 'Recovered_Category', 'Brand_Tier', 'Category_Tier']
+
+def device_keys(df):
+    """Asset Tag ID per row; repeated IDs get '#2', '#3', ... in file order so every key is unique"""
+    ids = df['Asset Tag ID'].astype(object).where(df['Asset Tag ID'].notna(), '').map(str)
+    occurrence = ids.groupby(ids).cumcount()
+    return ids.where(occurrence == 0, ids + '#' + (occurrence + 1).astype(str)).to_numpy()
+
+def row_hashes(df):
+    """Content hash of every row (all columns), to tell changed rows from unchanged ones"""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+def state_fingerprint(brand_replacements, category_replacements):
+    """Identifies what the stored fields were derived with; a different fingerprint forces a full rebuild"""
+    settings = {'version': STATE_VERSION, 'brand_replacements': brand_replacements,
+                'category_replacements': category_replacements}
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+def load_state(state_dir):
+    """The stored per-device state and its metadata, or (None, None) when there is no usable store"""
+    state_path, meta_path = os.path.join(state_dir, STATE_FILE), os.path.join(state_dir, STATE_META_FILE)
+    if not SIDECAR_AVAILABLE or not (os.path.exists(state_path) and os.path.exists(meta_path)):
+        return None, None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as meta_file:
+            meta = json.load(meta_file)
+        return pd.read_parquet(state_path), meta
+    except Exception as e:
+        print(f"  ⚠️  Could not read the state store in {state_dir}: {e}")
+        return None, None
+
+def save_state(state_dir, state, meta):
+    if not SIDECAR_AVAILABLE:
+        print("  ⚠️  pyarrow not installed - state store not saved (the next run is a full rebuild)")
+        return
+    os.makedirs(state_dir, exist_ok=True)
+    state.to_parquet(os.path.join(state_dir, STATE_FILE), index=False)
+    with open(os.path.join(state_dir, STATE_META_FILE), 'w', encoding='utf-8') as meta_file:
+        json.dump(meta, meta_file, indent=2)
+
+def derive_device_fields(rows, brand_replacements, category_replacements, date_format):
+    """
+    The costly row-local stages for new or changed rows: status classification, brand/category
+    normalization, purchase date parsing (with the store's date format), brand/category recovery
+    from the description fields, and the brand/category risk tiers.
+    """
+    status_class, status_label = classify_statuses(rows['Status'])
+    brand, _ = normalize_column(rows['Brand'], brand_replacements)
+    category, _ = normalize_column(rows['Category'], category_replacements)
+
+    # Recovery only for devices still missing a brand or category after normalization
+    recovered_brand = pd.Series(np.nan, index=rows.index, dtype=object)
+    recovered_category = pd.Series(np.nan, index=rows.index, dtype=object)
+    missing = is_blank(brand) | is_blank(category)
+    if missing.any():
+        recovered, _, _ = recover_missing_fields(rows[missing].assign(Brand=brand[missing], Category=category[missing]))
+        recovered_brand[missing] = recovered['Brand'].to_numpy()
+        recovered_category[missing] = recovered['Category'].to_numpy()
+
+    return pd.DataFrame({
+        'Status_Class': status_class.astype(object),
+        'Status_Normalized': status_label.astype(object),
+        'Brand_Normalized': brand.astype(object),
+        'Category_Normalized': category.astype(object),
+        'Raw_Brand_Missing': is_blank(rows['Brand']),
+        'Raw_Category_Missing': is_blank(rows['Category']),
+        'Purchase_Date_Parsed': parse_purchase_dates(rows['Purchase Date'], date_format=date_format),
+        'Recovered_Brand': recovered_brand,
+        'Recovered_Category': recovered_category,
+        'Brand_Tier': tier_codes(brand, brand_tier, BRAND_TIER_NAMES),
+        'Category_Tier': tier_codes(category, category_tier, CATEGORY_TIER_NAMES)
+    }, index=rows.index)
+
+def evaluate_devices(raw, derived, as_of, model=None):
+    """
+    Vectorized per-run pass over every device: date status and age against the as-of date, the
+    data-quality mask, and risk scores for the analysis-ready devices (from the stored tiers).
+    Returns (devices with the analyzer's derived columns, quality mask, analysis-ready mask).
+    """
+    model = model or load_risk_model()
+    valid_dates, date_status = classify_purchase_dates(raw['Purchase Date'], derived['Purchase_Date_Parsed'], as_of=as_of)
+    age_years = calculate_age_years(valid_dates, as_of=as_of)
+
+    quality_mask = flag_status_checks(new_quality_mask(len(raw)), derived['Status_Class'])
+    flag_check(quality_mask, RAW_BRAND_MISSING, derived['Raw_Brand_Missing'].to_numpy())
+    flag_check(quality_mask, RAW_CATEGORY_MISSING, derived['Raw_Category_Missing'].to_numpy())
+    flag_check(quality_mask, MISSING_BRAND, is_blank(derived['Brand_Normalized']))
+    flag_check(quality_mask, MISSING_CATEGORY, is_blank(derived['Category_Normalized']))
+    flag_check(quality_mask, INVALID_PURCHASE_DATE, (date_status != 'Valid').to_numpy())
+
+    devices = raw.assign(Brand=derived['Brand_Normalized'], Category=derived['Category_Normalized'],
+                         Status_Normalized=derived['Status_Normalized'], Purchase_Date_Parsed=valid_dates,
+                         Purchase_Date_Status=date_status, Device_Age_Years=age_years.round(1))
+
+    ready = has_none(quality_mask, ISSUE_BITS)
+    scores = score_models({'age_years': age_years.to_numpy(dtype=float)[ready],
+                           'brand_tier': derived['Brand_Tier'].to_numpy()[ready],
+                           'category_tier': derived['Category_Tier'].to_numpy()[ready]}, [model])
+    devices['Total_Risk_Score'] = np.nan
+    devices['Risk_Level'] = pd.Series(None, index=devices.index, dtype=object)
+    devices.loc[ready, 'Total_Risk_Score'] = scores['total_score'][:, 0]
+    devices.loc[ready, 'Risk_Level'] = np.array(RISK_LEVELS, dtype=object)[scores['risk_level'][:, 0]]
+    return devices, quality_mask, ready
+
+def recovered_count(derived, quality_mask):
+    """Devices the advanced cleaning would move into the fully valid data: active, valid date, brand and category recovered"""
+    candidates = (has_any(quality_mask, MISSING_BRAND | MISSING_CATEGORY)
+                  & has_none(quality_mask, INVALID_PURCHASE_DATE | NOT_ACTIVE))
+    recovered = ~is_blank(derived['Recovered_Brand']) & ~is_blank(derived['Recovered_Category'])
+    return int((candidates & recovered).sum())
+
+def run_incremental(csv_path, state_dir='incremental_state', output_dir='incremental_output', as_of=None,
+                    full_rebuild=False, model=None):
+    """
+    Incremental re-analysis: rows are keyed by Asset Tag ID and compared with the state store by content hash.
+    Only added or changed rows go through the row-local stages; removed rows are dropped; the aggregates are
+    recomputed from the stored fields in one vectorized pass. Writes the data quality summary, the scored
+    analysis-ready devices and the change list to output_dir, and returns a run summary.
+    """
+    started = time.perf_counter()
+    as_of = resolve_as_of(as_of)
+    brand_replacements, category_replacements = load_replacement_tables()
+    fingerprint = state_fingerprint(brand_replacements, category_replacements)
+
+    raw = pd.read_csv(csv_path, encoding='latin-1', dtype=str)
+    keys, hashes = device_keys(raw), row_hashes(raw)
+
+    state, meta = (None, None) if full_rebuild else load_state(state_dir)
+    if state is not None and meta.get('fingerprint') != fingerprint:
+        print("  ♻️  Normalization rules or state version changed - rebuilding every device")
+        state = None
+
+    if state is None:
+        date_format = detect_date_format(pd.unique(raw['Purchase Date'].dropna()))
+        state = pd.DataFrame({'Device_Key': pd.Series([], dtype=object), 'Row_Hash': pd.Series([], dtype=np.uint64)})
+    else:
+        date_format = meta.get('date_format')
+
+    # Match rows to the stored devices by key, then by content hash
+    positions = pd.Index(state['Device_Key']).get_indexer(keys)
+    known = positions >= 0
+    unchanged = known.copy()
+    unchanged[known] = state['Row_Hash'].to_numpy()[positions[known]] == hashes[known]
+    still_present = np.zeros(len(state), dtype=bool)
+    still_present[positions[known]] = True
+    removed_keys = state['Device_Key'].to_numpy(dtype=object)[~still_present]
+
+    derived = derive_device_fields(raw[~unchanged], brand_replacements, category_replacements, date_format)
+    if unchanged.any():
+        reused = state.iloc[positions[unchanged]][DERIVED_FIELDS].set_axis(np.flatnonzero(unchanged))
+        derived = pd.concat([reused, derived]).sort_index()
+
+    new_state = derived.assign(Row_Hash=hashes)
+    new_state.insert(0, 'Device_Key', keys)
+    save_state(state_dir, new_state, {'fingerprint': fingerprint, 'date_format': date_format,
+                                      'source': os.path.abspath(csv_path), 'devices': len(raw)})
+
+    devices, quality_mask, ready = evaluate_devices(raw, derived, as_of, model)
+    summary = build_quality_summary(mask_counts(quality_mask))
+    changes = pd.DataFrame({
+        'Device_Key': np.concatenate([keys[~unchanged & ~known], keys[~unchanged & known], removed_keys]),
+        'Change': (['added'] * int((~unchanged & ~known).sum()) + ['changed'] * int((~unchanged & known).sum())
+                   + ['removed'] * len(removed_keys))
+    })
+
+    os.makedirs(output_dir, exist_ok=True)
+    summary.to_csv(os.path.join(output_dir, 'Data_Quality_Summary.csv'), index=False)
+    changes.to_csv(os.path.join(output_dir, 'Device_Changes.csv'), index=False)
+    scored = devices[ready].reset_index(drop=True)
+    if SIDECAR_AVAILABLE:
+        scored.to_parquet(os.path.join(output_dir, 'Scored_Analysis_Ready_Data.parquet'), index=False)
+    else:
+        scored.to_csv(os.path.join(output_dir, 'Scored_Analysis_Ready_Data.csv'), index=False)
+
+    return {
+        'devices': len(raw),
+        'added': int((~unchanged & ~known).sum()),
+        'changed': int((~unchanged & known).sum()),
+        'removed': len(removed_keys),
+        'unchanged': int(unchanged.sum()),
+        'fully_valid': int(has_none(quality_mask, FULLY_VALID_BITS).sum()),
+        'recovered': recovered_count(derived, quality_mask),
+        'analysis_ready': int(ready.sum()),
+        'risk_levels': {level: int((scored['Risk_Level'] == level).sum()) for level in RISK_LEVELS},
+        'summary': summary,
+        'seconds': time.perf_counter() - started
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Incremental DLM re-analysis (only new or changed devices are reprocessed)')
+    parser.add_argument('--input', default='Inventory.csv')
+    parser.add_argument('--state-dir', default='incremental_state', help='where per-device hashes and derived fields are kept')
+    parser.add_argument('--output-dir', default='incremental_output')
+    parser.add_argument('--as-of', default=None, help='date device ages are measured against (default: today)')
+    parser.add_argument('--full', action='store_true', help='ignore the state store and rebuild every device')
+    args = parser.parse_args()
+
+    print("🔁 DLM Incremental Analysis")
+    print("=" * 60)
+    try:
+        result = run_incremental(args.input, args.state_dir, args.output_dir, args.as_of, args.full)
+    except FileNotFoundError:
+        print(f"Error: Could not find the CSV file at {args.input}")
+        return
+
+    print(f"📦 {result['devices']} devices: {result['added']} added, {result['changed']} changed, "
+          f"{result['removed']} removed, {result['unchanged']} unchanged (reused from {args.state_dir})")
+    print(f"✅ Fully valid: {result['fully_valid']} (+{result['recovered']} recoverable) - "
+          f"analysis-ready: {result['analysis_ready']}")
+    for level, count in result['risk_levels'].items():
+        print(f"   {level}: {count} devices")
+    print(f"⚡ Done in {result['seconds']:.2f}s - results saved to {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
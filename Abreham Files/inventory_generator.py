@@ -0,0 +1,136 @@
+import os
+import numpy as np
+import pandas as pd
+from device_status_classifier import ACTIVE_STATUSES, INACTIVE_STATUSES
+from device_value_normalizer import load_replacement_tables
+from purchase_date_validator import resolve_as_of
+
+# Real exports used as templates: generated rows are resampled from them, then made messy
+TEMPLATE_PATHS = {
+    'inventory': 'Inventory.csv',
+    'assets': os.path.join('..', "Victor's Code", 'assets.csv')
+}
+
+# Share of generated rows hit by each kind of problem (on top of whatever the template already has)
+DEFAULT_MESSINESS = {
+    'misspelled_brand': 0.03,   # 'Epsson', 'Hewlett Packard', ' dell ', 'LENOVO', ...
+    'missing_brand': 0.02,
+    'missing_category': 0.03,
+    'bad_date': 0.02,           # unparseable purchase dates
+    'future_date': 0.01,
+    'old_date': 0.02,           # before MIN_VALID_YEAR
+    'missing_date': 0.01,
+    'status_variant': 0.25      # re-drawn from every active/inactive/unknown status variant
+}
+
+BAD_DATE_STRINGS = ['N/A', 'unknown', '00/00/0000', '2020-13-45', '31/31/2019', 'TBD', '2019-02-30', '?', '0201-01-01', '1/1/0201']
+
+UNKNOWN_STATUS_VALUES = ['Pending Review', 'In Transit', 'Retired?', 'See Notes', '']
+
+# Rows written per chunk when generating very large files
+GENERATOR_CHUNK_SIZE = 500000
+
+def load_template(layout, template_path=None):
+    """Load the real export for a layout to resample rows from"""
+    template_path = template_path or TEMPLATE_PATHS[layout]
+    template = pd.read_csv(template_path, encoding='latin-1', dtype=str)
+    template.columns = [col.strip() for col in template.columns]
+    return template
+
+def status_variants():
+    """Every status spelling the classifier has to handle: all keywords in several casings plus unknowns"""
+    variants = []
+    for status in ACTIVE_STATUSES + INACTIVE_STATUSES:
+        variants.extend([status, status.title(), status.upper(), f" {status.capitalize()} "])
+    return variants + UNKNOWN_STATUS_VALUES
+
+def brand_misspellings(template):
+    """Misspellings the normalizer knows about plus case/whitespace variants of real brands"""
+    brand_replacements, _ = load_replacement_tables()
+    misspellings = [raw.title() for raw in brand_replacements]
+    brands = template['Brand'].dropna().unique()[:20] if 'Brand' in template.columns else []
+    for brand in brands:
+        misspellings.extend([brand.upper(), brand.lower(), f" {brand} "])
+    return misspellings
+
+def random_dates(rng, count, start, end, date_format):
+    """Uniformly random dates between start and end, formatted like the export"""
+    start_ns, end_ns = pd.Timestamp(start).value, pd.Timestamp(end).value
+    values = rng.integers(start_ns, end_ns, size=count)
+    return pd.to_datetime(values).strftime(date_format).to_numpy(dtype=object)
+
+def inject(rng, frame, column, rate, values):
+    """Overwrite a random share of a column with values drawn from the given pool"""
+    if column not in frame.columns or rate <= 0:
+        return 0
+    hit = rng.random(len(frame)) < rate
+    count = int(hit.sum())
+    if count:
+        frame.loc[hit, column] = rng.choice(np.asarray(values, dtype=object), size=count)
+    return count
+
+def generate_inventory(n_rows, layout='inventory', seed=0, as_of=None, messiness=None,
+                       template=None, start_id=0, date_format='%Y-%m-%d'):
+    """
+    Generate n_rows of a synthetic inventory with the Inventory.csv or assets.csv column layout.
+    Rows are resampled from the real export (so descriptions, models and brands stay consistent),
+    given fresh Asset Tag IDs, serials and purchase dates, then made messy at the configured rates.
+    """
+    rng = np.random.default_rng(seed)
+    as_of = resolve_as_of(as_of)
+    messiness = {**DEFAULT_MESSINESS, **(messiness or {})}
+    template = template if template is not None else load_template(layout)
+
+    frame = template.iloc[rng.integers(0, len(template), size=n_rows)].reset_index(drop=True)
+
+    # Unique identifiers
+    ids = np.arange(start_id, start_id + n_rows)
+    frame['Asset Tag ID'] = pd.Series(ids).map(lambda i: f"SYN-{i:08d}").to_numpy(dtype=object)
+    if 'Serial No' in frame.columns:
+        frame['Serial No'] = pd.Series(ids).map(lambda i: f"SN{i:010X}").to_numpy(dtype=object)
+
+    # Mostly valid purchase dates spread over the last 14 years
+    frame['Purchase Date'] = random_dates(rng, n_rows, as_of - pd.DateOffset(years=14), as_of, date_format)
+
+    # Messiness
+    inject(rng, frame, 'Brand', messiness['misspelled_brand'], brand_misspellings(template))
+    inject(rng, frame, 'Brand', messiness['missing_brand'], [np.nan])
+    inject(rng, frame, 'Category', messiness['missing_category'], [np.nan, '', ' '])
+    inject(rng, frame, 'Purchase Date', messiness['bad_date'], BAD_DATE_STRINGS)
+    inject(rng, frame, 'Purchase Date', messiness['future_date'],
+           random_dates(rng, 200, as_of + pd.Timedelta(days=30), as_of + pd.DateOffset(years=3), date_format))
+    inject(rng, frame, 'Purchase Date', messiness['old_date'],
+           random_dates(rng, 200, '1998-01-01', '2009-12-31', date_format))
+    inject(rng, frame, 'Purchase Date', messiness['missing_date'], [np.nan])
+    inject(rng, frame, 'Status', messiness['status_variant'], status_variants())
+
+    return frame
+
+def write_synthetic_csv(output_path, n_rows, layout='inventory', seed=0, as_of=None, messiness=None,
+                        chunk_size=GENERATOR_CHUNK_SIZE):
+    """Write a synthetic inventory CSV chunk by chunk (memory stays flat even for 10M rows)"""
+    template = load_template(layout)
+    written = 0
+    chunk_number = 0
+    while written < n_rows:
+        rows = min(chunk_size, n_rows - written)
+        chunk = generate_inventory(rows, layout=layout, seed=seed + chunk_number, as_of=as_of,
+                                   messiness=messiness, template=template, start_id=written)
+        chunk.to_csv(output_path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        written += rows
+        chunk_number += 1
+    return output_path
+
+def main():
+    sizes = [10000, 100000]
+    output_dir = 'synthetic_inventories'
+    os.makedirs(output_dir, exist_ok=True)
+
+    for layout in TEMPLATE_PATHS:
+        for n_rows in sizes:
+            output_path = os.path.join(output_dir, f"{layout}_{n_rows}.csv")
+            write_synthetic_csv(output_path, n_rows, layout=layout)
+            print(f"🧪 Wrote {n_rows} synthetic {layout} rows to {output_path}")
+
+if __name__ == "__main__":
+    main()
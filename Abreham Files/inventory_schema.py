@@ -0,0 +1,154 @@
+import importlib.util
+import pandas as pd
+from purchase_date_validator import parse_purchase_dates
+
+# pyarrow is optional: checked once here (without importing it) for every module that can use it
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+# Arrow-backed strings are much smaller than object columns; fall back to plain strings without pyarrow
+TEXT_DTYPE = 'string[pyarrow]' if PYARROW_AVAILABLE else 'string'
+
+# Column kinds:
+#   'category' - low-cardinality labels, stored as pandas categoricals
+#   'text'     - free text / identifiers, stored as (Arrow-backed) strings
+#   'date'     - parsed to datetime64 at load time
+#   'currency' - '$1,299.00' style amounts parsed to float
+
+# Inventory.csv layout (Asset Tiger export used by the analyzers)
+INVENTORY_SCHEMA = {
+    'Asset Tag ID': 'text',
+    'Site': 'category',
+    'Location': 'category',
+    'Category': 'category',
+    'Assigned to': 'text',
+    'Description': 'text',
+    'Device Name': 'text',
+    'Model': 'text',
+    'Brand': 'category',
+    'Serial No': 'text',
+    'School District': 'category',
+    'Purchase Date': 'date',
+    'Cost': 'currency',
+    'Status': 'category',
+    'Date Created': 'date',
+    'Created by': 'category',
+    'OS': 'category',
+    'CPU': 'category',
+    'RAM': 'category',
+    'Hard Drive': 'category'
+}
+
+# assets.csv layout (used by Victor's assessment tool)
+ASSETS_SCHEMA = {
+    'Asset Tag ID': 'text',
+    'Description': 'text',
+    'Purchased from': 'category',
+    'Purchase Date': 'date',
+    'Brand': 'category',
+    'Cost': 'currency',
+    'Model': 'text',
+    'Serial No': 'text',
+    'Date Created': 'date',
+    'Created by': 'category'
+}
+
+SCHEMAS = {
+    'inventory': INVENTORY_SCHEMA,
+    'assets': ASSETS_SCHEMA
+}
+
+def detect_schema(columns):
+    """Pick the schema whose columns best match the file header (None if nothing fits)"""
+    columns = set(col.strip() for col in columns)
+    best_name, best_overlap = None, 0
+    for name, schema in SCHEMAS.items():
+        overlap = len(columns & set(schema))
+        if overlap > best_overlap:
+            best_name, best_overlap = name, overlap
+    return best_name
+
+def parse_currency(series):
+    """Parse '$999.00' / '1,299.00' style amounts to float (NaN where empty or unparseable)"""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    cleaned = series.astype(str).str.replace(r'[\$,\s]', '', regex=True)
+    return pd.to_numeric(cleaned.where(series.notna()), errors='coerce')
+
+def validate_schema(df, schema):
+    """Check the header against the schema; returns (missing columns, unexpected columns)"""
+    missing_columns = [col for col in schema if col not in df.columns]
+    unexpected_columns = [col for col in df.columns if col not in schema]
+    return missing_columns, unexpected_columns
+
+def apply_schema(df, schema):
+    """
+    Convert raw columns to the schema's types in place of pandas' object inference.
+    Returns (typed DataFrame, {column: number of non-empty values that failed to convert}).
+    """
+    typed = df.copy()
+    conversion_failures = {}
+
+    for col, kind in schema.items():
+        if col not in typed.columns:
+            continue
+        raw = typed[col]
+        if kind == 'category':
+            typed[col] = raw.astype('category')
+        elif kind == 'text':
+            typed[col] = raw.astype(TEXT_DTYPE)
+        elif kind == 'date':
+            typed[col] = parse_purchase_dates(raw)
+            conversion_failures[col] = int((raw.notna() & typed[col].isna()).sum())
+        elif kind == 'currency':
+            typed[col] = parse_currency(raw)
+            conversion_failures[col] = int((raw.notna() & typed[col].isna()).sum())
+
+    # Columns outside the schema are still stored as compact strings
+    for col in typed.columns:
+        if col not in schema and typed[col].dtype == object:
+            typed[col] = typed[col].astype(TEXT_DTYPE)
+
+    return typed, {col: count for col, count in conversion_failures.items() if count > 0}
+
+def memory_report(df):
+    """Per-column dtype and resident memory (MB), largest first"""
+    memory = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'Column': memory.index,
+        'Dtype': [str(df[col].dtype) for col in memory.index],
+        'Memory_MB': (memory.values / 1024 ** 2).round(3)
+    })
+    return report.sort_values('Memory_MB', ascending=False).reset_index(drop=True)
+
+def load_typed_inventory(csv_path, schema_name=None, encoding='latin-1', report=True):
+    """
+    Load an Inventory.csv or assets.csv export with an explicit schema.
+    Raises ValueError when required schema columns are missing; prints a memory report when report=True.
+    """
+    raw = pd.read_csv(csv_path, encoding=encoding, dtype=str, keep_default_na=True)
+    raw.columns = [col.strip() for col in raw.columns]
+
+    schema_name = schema_name or detect_schema(raw.columns)
+    if schema_name is None:
+        raise ValueError(f"{csv_path} doesn't match any known inventory layout ({', '.join(SCHEMAS)})")
+    schema = SCHEMAS[schema_name]
+
+    missing_columns, unexpected_columns = validate_schema(raw, schema)
+    if missing_columns:
+        raise ValueError(f"{csv_path} is missing {schema_name} columns: {missing_columns}")
+
+    typed, conversion_failures = apply_schema(raw, schema)
+
+    if report:
+        print(f"📋 Loaded {len(typed)} rows from {csv_path} using the '{schema_name}' schema")
+        if unexpected_columns:
+            print(f"  ⚠️  Columns not in schema (kept as text): {unexpected_columns}")
+        for col, count in conversion_failures.items():
+            print(f"  ⚠️  {col}: {count} values could not be converted")
+        raw_mb = raw.memory_usage(deep=True, index=False).sum() / 1024 ** 2
+        typed_report = memory_report(typed)
+        print(f"  💾 Memory: {typed_report['Memory_MB'].sum():.2f} MB typed vs {raw_mb:.2f} MB untyped")
+        for _, row in typed_report.iterrows():
+            print(f"     {row['Column']:<20} {row['Dtype']:<22} {row['Memory_MB']:.3f} MB")
+
+    return typed
@@ -0,0 +1,171 @@
+import argparse
+import os
+import re
+import sqlite3
+import time
+import pandas as pd
+
+STORE_PATH = 'inventory_store.db'
+
+# Tables the analyzers load into: every device after normalization, and the scored analysis-ready devices
+DEVICES_TABLE = 'devices'
+RISK_TABLE = 'risk_analysis'
+
+# Columns indexed for the common lookups (a table only gets the ones it has; Source is the batch mode's
+# per-export provenance). Text comparisons on them ignore case, so 'tablet' finds 'Tablet' and still uses the index.
+INDEXED_COLUMNS = ['Asset Tag ID', 'Serial No', 'Site', 'Location', 'Category', 'Brand',
+                   'Status_Normalized', 'Risk_Level', 'Assigned to', 'Source']
+
+# Rows per INSERT transaction when loading a frame
+INSERT_BATCH_ROWS = 50000
+
+def quote_identifier(name):
+    """Column and table names may contain spaces ('Asset Tag ID'), so they are always quoted"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+def column_type(series, indexed):
+    """SQLite column type for a frame column (indexed text columns compare case-insensitively)"""
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(series):
+        return 'REAL'
+    return 'TEXT COLLATE NOCASE' if indexed else 'TEXT'
+
+def column_values(series):
+    """A column as plain Python values for sqlite3: missing values become NULL, datetimes ISO text"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        series = series.dt.strftime('%Y-%m-%d %H:%M:%S')
+    values = series.astype(object).to_numpy(copy=True)
+    values[pd.isna(values)] = None
+    return values.tolist()
+
+def open_store(store_path=STORE_PATH):
+    return sqlite3.connect(store_path)
+
+def load_frame(conn, table, df, batch_rows=INSERT_BATCH_ROWS):
+    """
+    Replace a store table with the frame's rows. Rows go in with executemany, one transaction per
+    batch; the lookup indexes are built once after the load (cheaper than updating them per insert).
+    Returns the number of rows loaded.
+    """
+    indexed = [col for col in INDEXED_COLUMNS if col in df.columns]
+    definitions = ', '.join(f"{quote_identifier(col)} {column_type(df[col], col in indexed)}" for col in df.columns)
+    with conn:
+        conn.execute(f"DROP TABLE IF EXISTS {quote_identifier(table)}")
+        conn.execute(f"CREATE TABLE {quote_identifier(table)} ({definitions})")
+
+    insert = (f"INSERT INTO {quote_identifier(table)} VALUES ({', '.join('?' * len(df.columns))})")
+    columns = [column_values(df[col]) for col in df.columns]
+    for start in range(0, len(df), batch_rows):
+        with conn:
+            conn.executemany(insert, zip(*(values[start:start + batch_rows] for values in columns)))
+
+    with conn:
+        for col in indexed:
+            index_name = re.sub(r'\W+', '_', f"idx_{table}_{col}")
+            conn.execute(f"CREATE INDEX {quote_identifier(index_name)} ON {quote_identifier(table)} ({quote_identifier(col)})")
+        # Table statistics, so a query filtering on several indexed columns picks the most selective index
+        conn.execute(f"ANALYZE {quote_identifier(table)}")
+    return len(df)
+
+def write_store(store_path, tables, batch_rows=INSERT_BATCH_ROWS):
+    """Load several frames ({table: frame}) into the store; returns {table: rows loaded}"""
+    conn = open_store(store_path)
+    try:
+        return {table: load_frame(conn, table, df, batch_rows) for table, df in tables.items() if df is not None}
+    finally:
+        conn.close()
+
+def table_columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({quote_identifier(table)})")]
+
+def find_devices(conn, filters=None, table=RISK_TABLE, columns=None, order_by=None, descending=True, limit=None):
+    """
+    Rows of a store table matching every filter, as a DataFrame.
+    filters: {column: value or list of values}, e.g. {'Risk_Level': 'HIGH RISK', 'Category': 'PC Laptop'}
+    order_by / descending / limit: optional sort column and row cap (e.g. the 20 highest Total_Risk_Score)
+    """
+    available = table_columns(conn, table)
+    if not available:
+        raise ValueError(f"Table not in the store: {table}")
+    missing = [col for col in list(filters or {}) + list(columns or []) + ([order_by] if order_by else [])
+               if col not in available]
+    if missing:
+        raise ValueError(f"Columns not in {table}: {missing}")
+
+    conditions, params = [], []
+    for col, value in (filters or {}).items():
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        conditions.append(f"{quote_identifier(col)} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+
+    select = ', '.join(quote_identifier(col) for col in columns) if columns else '*'
+    sql = f"SELECT {select} FROM {quote_identifier(table)}"
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    if order_by:
+        sql += f" ORDER BY {quote_identifier(order_by)} {'DESC' if descending else 'ASC'}"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    return pd.read_sql_query(sql, conn, params=params)
+
+def risk_devices(conn, level='HIGH RISK', site=None, location=None, category=None, brand=None, limit=None):
+    """Scored devices at a risk level, optionally at one site/location or of one category/brand, riskiest first"""
+    filters = {'Risk_Level': level, 'Site': site, 'Location': location, 'Category': category, 'Brand': brand}
+    return find_devices(conn, {col: value for col, value in filters.items() if value is not None},
+                        table=RISK_TABLE, order_by='Total_Risk_Score', limit=limit)
+
+def devices_assigned_to(conn, person, table=DEVICES_TABLE):
+    """Everything assigned to one person (every device, valid or not, from the device analyzer's load)"""
+    return find_devices(conn, {'Assigned to': person}, table=table)
+
+def lookup_device(conn, asset_tag=None, serial=None, table=DEVICES_TABLE):
+    """A device by Asset Tag ID and/or Serial No"""
+    filters = {'Asset Tag ID': asset_tag, 'Serial No': serial}
+    return find_devices(conn, {col: value for col, value in filters.items() if value is not None}, table=table)
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the DLM inventory store (loaded by the analyzers with store_path=...)')
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--level', default=None, help="risk level, e.g. 'HIGH RISK' (queries the scored devices)")
+    parser.add_argument('--site', default=None)
+    parser.add_argument('--location', default=None)
+    parser.add_argument('--category', default=None)
+    parser.add_argument('--brand', default=None)
+    parser.add_argument('--assigned-to', default=None)
+    parser.add_argument('--asset-tag', default=None)
+    parser.add_argument('--serial', default=None)
+    parser.add_argument('--limit', type=int, default=None)
+    args = parser.parse_args()
+
+    print("🗄️  DLM Inventory Store Query")
+    print("=" * 60)
+    if not os.path.exists(args.store):
+        print(f"Error: No inventory store at {args.store} - run the analyzers with store_path='{args.store}' first")
+        return
+    conn = open_store(args.store)
+    try:
+        started = time.perf_counter()
+        if args.asset_tag or args.serial:
+            result = lookup_device(conn, args.asset_tag, args.serial)
+        elif args.assigned_to:
+            result = devices_assigned_to(conn, args.assigned_to)
+        else:
+            result = risk_devices(conn, args.level or 'HIGH RISK', args.site, args.location, args.category,
+                                  args.brand, args.limit)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    except (sqlite3.Error, ValueError) as e:
+        print(f"❌ Query failed: {e}")
+        print("Make sure the analyzers have loaded the store (store_path=...) first.")
+        return
+    finally:
+        conn.close()
+
+    print(f"🔎 {len(result)} devices found in {elapsed_ms:.1f} ms")
+    if len(result):
+        shown = [col for col in ['Asset Tag ID', 'Site', 'Location', 'Category', 'Brand', 'Assigned to',
+                                 'Status_Normalized', 'Total_Risk_Score', 'Risk_Level'] if col in result.columns]
+        print(result[shown].head(args.limit or 20).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
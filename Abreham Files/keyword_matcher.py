@@ -0,0 +1,60 @@
+import re
+import pandas as pd
+import numpy as np
+
+def compile_keyword_matcher(patterns, word_boundary=False):
+    """
+    Compile a {label: [keywords]} table into a single matcher that scans each text in one pass.
+    Labels keep their table order as priority (first label wins, like the old any(...) loops).
+    word_boundary: False for plain substring matching, True to require whole words for every keyword,
+                   or a collection of keywords that must match as whole words (e.g. {'ap'}).
+    """
+    labels = list(patterns.keys())
+    keyword_priorities = {}
+    alternatives = []
+
+    for priority, label in enumerate(labels):
+        for keyword in patterns[label]:
+            keyword = str(keyword).lower()
+            if keyword in keyword_priorities:
+                continue  # an earlier label already claims this keyword
+            keyword_priorities[keyword] = priority
+            if word_boundary is True or (word_boundary and keyword in word_boundary):
+                alternatives.append(r'\b' + re.escape(keyword) + r'\b')
+            else:
+                alternatives.append(re.escape(keyword))
+
+    # One alternation in priority order (no capture groups, so the regex engine can prefilter on
+    # first characters): at any start position the first keyword that matches is the best one there
+    regex = re.compile('|'.join(alternatives)) if alternatives else None
+
+    return {
+        'labels': labels,
+        'regex': regex,
+        'keyword_priorities': keyword_priorities
+    }
+
+def match_text(matcher, text, default=""):
+    """Return the highest-priority label whose keywords appear in text (default if none)"""
+    if matcher['regex'] is None or pd.isna(text):
+        return default
+
+    text_lower = str(text).lower().strip()
+    best_priority = None
+    match = matcher['regex'].search(text_lower)
+    while match is not None:
+        priority = matcher['keyword_priorities'][match.group()]
+        if best_priority is None or priority < best_priority:
+            best_priority = priority
+            if best_priority == 0:
+                break
+        # Resume one character later so overlapping keywords are still seen
+        match = matcher['regex'].search(text_lower, match.start() + 1)
+
+    return matcher['labels'][best_priority] if best_priority is not None else default
+
+def match_series(matcher, series, default=""):
+    """Batch match a whole Series, scanning each distinct text once; returns an object array of labels"""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    matched_uniques = np.array([match_text(matcher, value, default) for value in uniques] + [default], dtype=object)
+    return matched_uniques[codes]
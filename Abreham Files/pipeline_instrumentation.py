@@ -0,0 +1,114 @@
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Peak RSS comes from the resource module (Unix); on Windows only tracemalloc peaks are available
+try:
+    import resource
+except ImportError:
+    resource = None
+
+MB = 1024 ** 2
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None where unavailable)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return round(peak / MB if sys.platform == 'darwin' else peak / 1024, 1)
+
+def start_run(run_name, trace_memory=False):
+    """
+    Start a run report. trace_memory=True also records each stage's peak Python allocations
+    with tracemalloc (more detail, but it slows pandas-heavy stages down noticeably).
+    """
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return {
+        'run': run_name,
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'trace_memory': trace_memory,
+        'stages': [],
+        '_wall_start': time.perf_counter(),
+        '_cpu_start': time.process_time()
+    }
+
+def start_stage(report, stage_name, rows_in=None):
+    """Begin timing a named stage; pass the returned stage to end_stage. Does nothing when report is None."""
+    if report is None:
+        return None
+    if report['trace_memory'] and tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    return {
+        'stage': stage_name,
+        'rows_in': rows_in,
+        '_wall_start': time.perf_counter(),
+        '_cpu_start': time.process_time()
+    }
+
+def end_stage(report, stage, rows_out=None):
+    """Record wall/CPU time, memory peaks and row counts for a stage started with start_stage"""
+    if report is None or stage is None:
+        return
+    stage['rows_out'] = rows_out
+    stage['wall_seconds'] = round(time.perf_counter() - stage.pop('_wall_start'), 4)
+    stage['cpu_seconds'] = round(time.process_time() - stage.pop('_cpu_start'), 4)
+    stage['peak_rss_mb'] = peak_rss_mb()
+    if report['trace_memory'] and tracemalloc.is_tracing():
+        stage['peak_traced_mb'] = round(tracemalloc.get_traced_memory()[1] / MB, 1)
+    report['stages'].append(stage)
+
+@contextmanager
+def track_stage(report, stage_name, rows_in=None):
+    """
+    Context manager form of start_stage/end_stage:
+        with track_stage(report, 'status', rows_in=len(df)) as stage:
+            ...
+            stage['rows_out'] = len(result)
+    """
+    stage = start_stage(report, stage_name, rows_in)
+    outcome = {'rows_out': None}
+    try:
+        yield outcome
+    finally:
+        end_stage(report, stage, outcome['rows_out'])
+
+def finish_run(report):
+    """Close the run: total wall/CPU time and overall memory peak"""
+    if report is None:
+        return None
+    report['wall_seconds'] = round(time.perf_counter() - report.pop('_wall_start'), 4)
+    report['cpu_seconds'] = round(time.process_time() - report.pop('_cpu_start'), 4)
+    report['peak_rss_mb'] = peak_rss_mb()
+    if report['trace_memory'] and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return report
+
+def write_run_report(report, report_path):
+    """Save the run report as JSON"""
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, default=str)
+    return report_path
+
+def format_stage_table(report):
+    """Plain-text summary table of the stages in run order, with each stage's share of the total wall time"""
+    total_wall = report.get('wall_seconds') or sum(stage['wall_seconds'] for stage in report['stages']) or 1
+    lines = [
+        f"{'Stage':<40} {'Wall s':>8} {'CPU s':>8} {'% Wall':>7} {'Rows in':>9} {'Rows out':>9} {'Peak RSS MB':>12}",
+        '-' * 99
+    ]
+    for stage in report['stages']:
+        rows_in = '' if stage['rows_in'] is None else stage['rows_in']
+        rows_out = '' if stage['rows_out'] is None else stage['rows_out']
+        peak = '' if stage['peak_rss_mb'] is None else stage['peak_rss_mb']
+        lines.append(
+            f"{stage['stage']:<40} {stage['wall_seconds']:>8.3f} {stage['cpu_seconds']:>8.3f} "
+            f"{stage['wall_seconds'] / total_wall * 100:>6.1f}% {rows_in:>9} {rows_out:>9} {peak:>12}"
+        )
+    if 'wall_seconds' in report:
+        lines.append('-' * 99)
+        lines.append(f"{'TOTAL':<40} {report['wall_seconds']:>8.3f} {report['cpu_seconds']:>8.3f}")
+    return '\n'.join(lines)
@@ -0,0 +1,128 @@
+import pandas as pd
+import numpy as np
+
+# Purchase date status codes (Valid first, then the invalid reasons)
+DATE_STATUSES = ['Valid', 'Missing', 'Future Date', 'Too Old', 'Invalid Format']
+
+# Dates before this year are treated as unreasonably old
+MIN_VALID_YEAR = 2010
+
+# Formats tried when detecting the dominant format of a purchase date column
+CANDIDATE_DATE_FORMATS = [
+    '%Y-%m-%d',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%d %H:%M:%S',
+    '%m/%d/%Y',
+    '%m/%d/%y',
+    '%m/%d/%Y %H:%M',
+    '%m-%d-%Y',
+    '%d-%b-%Y',
+    '%b %d, %Y',
+    '%Y/%m/%d'
+]
+
+def resolve_as_of(as_of=None):
+    """Return the as-of date used for every age calculation in a run (defaults to now, looked up once)"""
+    if as_of is None:
+        return pd.Timestamp.now()
+    return pd.Timestamp(as_of)
+
+def detect_date_format(raw_values, sample_size=500):
+    """Detect the dominant date format from a sample of distinct raw date strings (None if no format fits)"""
+    sample = pd.Series(raw_values, dtype=object).dropna().astype(str).str.strip()
+    sample = sample[sample != ''].head(sample_size)
+    if len(sample) == 0:
+        return None
+
+    best_format, best_count = None, 0
+    for date_format in CANDIDATE_DATE_FORMATS:
+        parsed_count = pd.to_datetime(sample, format=date_format, errors='coerce').notna().sum()
+        if parsed_count > best_count:
+            best_format, best_count = date_format, parsed_count
+            if best_count == len(sample):
+                break
+    return best_format
+
+def _fallback_parse(raw_value):
+    """Slow path for one string that doesn't match the dominant format (NaT when it can't be parsed)"""
+    try:
+        parsed_date = pd.to_datetime(raw_value)
+        if not pd.Timestamp.min <= parsed_date <= pd.Timestamp.max:
+            return pd.NaT
+        return parsed_date
+    except Exception:
+        return pd.NaT
+
+def parse_purchase_dates(date_series, date_format=None):
+    """
+    Parse a whole purchase date column, evaluating each distinct raw value once.
+    Uses one vectorized call for the dominant format and falls back to slow parsing only for leftovers.
+    Returns a datetime64 Series aligned to the input index (NaT where missing or unparseable).
+    """
+    if pd.api.types.is_datetime64_any_dtype(date_series):
+        return date_series
+
+    codes, uniques = pd.factorize(date_series, use_na_sentinel=True)
+    if len(uniques) == 0:
+        return pd.Series(pd.NaT, index=date_series.index, dtype='datetime64[ns]')
+
+    unique_values = pd.Series(np.asarray(uniques, dtype=object))
+    if date_format is None:
+        date_format = detect_date_format(unique_values)
+
+    # Fast path: one vectorized parse of the distinct values in the dominant format
+    if date_format is not None:
+        parsed_uniques = pd.to_datetime(unique_values.astype(str).str.strip(), format=date_format, errors='coerce')
+    else:
+        parsed_uniques = pd.Series(pd.NaT, index=unique_values.index, dtype='datetime64[ns]')
+    # Years outside the nanosecond range (1677-2262, e.g. a typo'd '0201-01-01') can't be held as datetime64[ns],
+    # so they become NaT here and get a status like any other unparseable date
+    parsed_uniques = parsed_uniques.where(parsed_uniques.between(pd.Timestamp.min, pd.Timestamp.max))
+    parsed_uniques = parsed_uniques.astype('datetime64[ns]')
+
+    # Slow path: only the leftover distinct strings the dominant format couldn't handle, each parsed once.
+    # Nothing is cached beyond this call, so long-lived processes don't accumulate every bad date seen.
+    leftover = parsed_uniques.isna()
+    if leftover.any():
+        fallback_dates = [_fallback_parse(value) for value in unique_values[leftover]]
+        parsed_uniques[leftover] = pd.to_datetime(pd.Series(fallback_dates, dtype=object), errors='coerce').to_numpy()
+
+    # Broadcast back to every row (code -1 marks missing values)
+    parsed_values = parsed_uniques.to_numpy()[codes]
+    parsed_values[codes == -1] = np.datetime64('NaT')
+    return pd.Series(parsed_values, index=date_series.index)
+
+def validate_purchase_dates(date_series, as_of=None, min_year=MIN_VALID_YEAR, date_format=None):
+    """
+    Validate a purchase date column in one pass.
+    Returns (parsed dates kept only where Valid, categorical Missing/Future Date/Too Old/Invalid Format status).
+    """
+    parsed_dates = parse_purchase_dates(date_series, date_format=date_format)
+    return classify_purchase_dates(date_series, parsed_dates, as_of=as_of, min_year=min_year)
+
+def classify_purchase_dates(date_series, parsed_dates, as_of=None, min_year=MIN_VALID_YEAR):
+    """
+    Status of already parsed purchase dates against the as-of date (the raw column tells missing from unparseable).
+    Returns (parsed dates kept only where Valid, categorical status) like validate_purchase_dates.
+    """
+    as_of = resolve_as_of(as_of)
+    status = np.full(len(date_series), 'Valid', dtype=object)
+    missing = date_series.isna().to_numpy()
+    unparsed = parsed_dates.isna().to_numpy() & ~missing
+    future = (parsed_dates > as_of).to_numpy()
+    too_old = (parsed_dates.dt.year < min_year).to_numpy()
+
+    # Same precedence as the original row-wise checks
+    status[too_old] = 'Too Old'
+    status[future] = 'Future Date'
+    status[unparsed] = 'Invalid Format'
+    status[missing] = 'Missing'
+
+    date_status = pd.Series(pd.Categorical(status, categories=DATE_STATUSES), index=date_series.index)
+    valid_dates = parsed_dates.where(date_status == 'Valid')
+    return valid_dates, date_status
+
+def calculate_age_years(parsed_dates, as_of=None, days_per_year=365.25):
+    """Device age in years relative to the as-of date (NaN where the date is missing)"""
+    as_of = resolve_as_of(as_of)
+    return (as_of - parsed_dates).dt.days / days_per_year
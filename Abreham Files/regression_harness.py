@@ -0,0 +1,266 @@
+import argparse
+import contextlib
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+from itertools import zip_longest
+import pandas as pd
+from openpyxl import load_workbook
+import device_analyzer_with_categories as device_analyzer
+from device_lifecycle_risk_analyzer import analyze_device_lifecycle_risk
+from pipeline_instrumentation import write_run_report
+from purchase_date_validator import validate_purchase_dates
+
+# Goldens are produced from the checked-in Inventory.csv with a fixed as-of date so ages never drift
+GOLDEN_DIR = 'golden_outputs'
+GOLDEN_AS_OF = '2025-07-01'
+INVENTORY_CSV = 'Inventory.csv'
+
+# Tool -> (golden workbook, stored baseline run report)
+GOLDEN_FILES = {
+    'device_analyzer': ('device_analysis_with_categories.xlsx', 'device_analyzer_baseline.json'),
+    'device_lifecycle_risk_analyzer': ('device_lifecycle_risk_analysis.xlsx', 'device_lifecycle_risk_analyzer_baseline.json')
+}
+
+# Performance gates: a stage fails when it is this much slower / bigger than the baseline...
+DEFAULT_TIME_THRESHOLD = 0.50      # +50% wall time
+DEFAULT_MEMORY_THRESHOLD = 0.25    # +25% peak RSS
+# ...and the increase is above the noise floor (tiny stages jitter by more than 50%)
+DEFAULT_MIN_SECONDS = 0.5
+DEFAULT_MIN_MB = 25
+
+# Floats are compared with a relative tolerance so re-ordered arithmetic (vectorized sums) still matches
+FLOAT_TOLERANCE = 1e-9
+
+# Mismatching cells listed per sheet before the rest are only counted
+MAX_CELL_DIFFS = 10
+
+# Purchase date columns the checked-in inventory doesn't cover -> expected status per value. Years outside
+# the nanosecond range (1677-2262) go through the fast path and the fallback, alone and mixed with good dates.
+DATE_EDGE_CASES = [
+    (['0201-01-01', '2020-01-01'], ['Invalid Format', 'Valid']),
+    (['1/1/2020', '1/1/0201'], ['Valid', 'Invalid Format']),
+    (['2020-01-01', '1/1/0201'], ['Valid', 'Invalid Format']),
+    (['2020-01-01', '9999-12-31', None], ['Valid', 'Invalid Format', 'Missing']),
+    (['0201-01-01'], ['Invalid Format'])
+]
+
+def run_tool(tool, work_dir, as_of):
+    """
+    Run one tool on the checked-in inventory, console output sent to <tool>.log in work_dir.
+    Runs in its own process (see run_isolated) so each tool's peak RSS is its own.
+    """
+    analysis_path = os.path.join(work_dir, GOLDEN_FILES['device_analyzer'][0])
+    risk_path = os.path.join(work_dir, GOLDEN_FILES['device_lifecycle_risk_analyzer'][0])
+    report_path = os.path.join(work_dir, f"{tool}_run_report.json")
+    with open(os.path.join(work_dir, f"{tool}.log"), 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log):
+        if tool == 'device_analyzer':
+            return device_analyzer.main(as_of=as_of, csv_path=INVENTORY_CSV, output_path=analysis_path,
+                                        report_path=report_path)
+        return analyze_device_lifecycle_risk(analysis_path, risk_path, as_of=as_of, report_path=report_path)
+
+def run_isolated(tool, work_dir, as_of):
+    """Run a tool in a fresh process and return its run report"""
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        return pool.apply(run_tool, (tool, work_dir, as_of))
+
+def run_pipeline(work_dir, as_of=GOLDEN_AS_OF):
+    """Run the analyzer then the risk analyzer (which reads the analyzer's output) into work_dir"""
+    reports = {}
+    for tool in GOLDEN_FILES:
+        print(f"▶️  Running {tool}...")
+        reports[tool] = run_isolated(tool, work_dir, as_of)
+        print(f"   done in {reports[tool]['wall_seconds']:.1f}s")
+    return reports
+
+def check_date_edge_cases(as_of=GOLDEN_AS_OF):
+    """Validate each DATE_EDGE_CASES column; returns the mismatches (an exception counts as one)"""
+    failures = []
+    for values, expected in DATE_EDGE_CASES:
+        try:
+            _, date_status = validate_purchase_dates(pd.Series(values, dtype=object), as_of=as_of)
+            actual = list(date_status.astype(str))
+        except Exception as e:
+            actual = f"{type(e).__name__}: {e}"
+        if actual != expected:
+            failures.append(f"{values}: expected {expected}, got {actual}")
+    return failures
+
+def cells_match(expected, actual):
+    if isinstance(expected, float) and isinstance(actual, (int, float)):
+        return math.isclose(expected, actual, rel_tol=FLOAT_TOLERANCE) or (math.isnan(expected) and math.isnan(actual))
+    return expected == actual
+
+def compare_sheet(expected_ws, actual_ws):
+    """Cell-for-cell comparison of two sheets; returns a list of difference messages"""
+    differences = []
+    mismatches = 0
+    expected_rows = expected_ws.iter_rows(values_only=True)
+    actual_rows = actual_ws.iter_rows(values_only=True)
+    for row_number, (expected_row, actual_row) in enumerate(zip_longest(expected_rows, actual_rows), start=1):
+        if expected_row is None or actual_row is None:
+            differences.append(f"row {row_number}: {'missing' if actual_row is None else 'unexpected'} row")
+            mismatches += 1
+            continue
+        for col_number, (expected, actual) in enumerate(zip_longest(expected_row, actual_row), start=1):
+            if not cells_match(expected, actual):
+                mismatches += 1
+                if mismatches <= MAX_CELL_DIFFS:
+                    differences.append(f"row {row_number}, column {col_number}: expected {expected!r}, got {actual!r}")
+    if mismatches > MAX_CELL_DIFFS:
+        differences.append(f"... {mismatches - MAX_CELL_DIFFS} more mismatching cells")
+    return differences
+
+def compare_workbooks(golden_path, actual_path):
+    """Compare every sheet of a produced workbook against its golden; returns {sheet: [differences]}"""
+    golden = load_workbook(golden_path, read_only=True)
+    actual = load_workbook(actual_path, read_only=True)
+    try:
+        results = {}
+        if golden.sheetnames != actual.sheetnames:
+            results['(sheet list)'] = [f"expected {golden.sheetnames}, got {actual.sheetnames}"]
+        for sheet_name in golden.sheetnames:
+            if sheet_name not in actual.sheetnames:
+                results[sheet_name] = ['sheet missing']
+                continue
+            results[sheet_name] = compare_sheet(golden[sheet_name], actual[sheet_name])
+        return results
+    finally:
+        golden.close()
+        actual.close()
+
+def compare_performance(baseline, current, time_threshold=DEFAULT_TIME_THRESHOLD,
+                        memory_threshold=DEFAULT_MEMORY_THRESHOLD,
+                        min_seconds=DEFAULT_MIN_SECONDS, min_mb=DEFAULT_MIN_MB):
+    """
+    Check each stage (and the run total) against the baseline run report.
+    A stage regresses when it is more than threshold slower/bigger AND the increase is above the noise floor.
+    Returns a list of regression messages; stages that are new or gone are not gated.
+    """
+    baseline_stages = {stage['stage']: stage for stage in baseline['stages']}
+    baseline_stages['TOTAL'] = baseline
+    current_stages = [(stage['stage'], stage) for stage in current['stages']] + [('TOTAL', current)]
+
+    regressions = []
+    for stage_name, stage in current_stages:
+        base = baseline_stages.get(stage_name)
+        if base is None:
+            continue
+        base_wall, wall = base['wall_seconds'], stage['wall_seconds']
+        if wall > base_wall * (1 + time_threshold) and wall - base_wall > min_seconds:
+            regressions.append(f"{stage_name}: wall time {base_wall:.2f}s -> {wall:.2f}s "
+                               f"(+{(wall / base_wall - 1) * 100 if base_wall else math.inf:.0f}%)")
+        base_peak, peak = base.get('peak_rss_mb'), stage.get('peak_rss_mb')
+        if base_peak and peak and peak > base_peak * (1 + memory_threshold) and peak - base_peak > min_mb:
+            regressions.append(f"{stage_name}: peak RSS {base_peak:.0f} MB -> {peak:.0f} MB "
+                               f"(+{(peak / base_peak - 1) * 100:.0f}%)")
+    return regressions
+
+def load_baseline(tool):
+    path = os.path.join(GOLDEN_DIR, GOLDEN_FILES[tool][1])
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def update_goldens(work_dir, reports, workbooks=True, baselines=True):
+    """Store this run's workbooks and/or run reports as the new goldens/baselines"""
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+    for tool, (workbook_name, baseline_name) in GOLDEN_FILES.items():
+        if workbooks:
+            shutil.copyfile(os.path.join(work_dir, workbook_name), os.path.join(GOLDEN_DIR, workbook_name))
+            print(f"💾 Golden workbook updated: {os.path.join(GOLDEN_DIR, workbook_name)}")
+        if baselines:
+            write_run_report(reports[tool], os.path.join(GOLDEN_DIR, baseline_name))
+            print(f"💾 Performance baseline updated: {os.path.join(GOLDEN_DIR, baseline_name)}")
+
+def check_against_goldens(work_dir, reports, check_performance=True, **thresholds):
+    """Compare a run with the stored goldens and baselines; returns True when everything passes"""
+    passed = True
+    for tool, (workbook_name, _) in GOLDEN_FILES.items():
+        print(f"\n🔍 {tool}: comparing {workbook_name} with the golden copy")
+        golden_path = os.path.join(GOLDEN_DIR, workbook_name)
+        if not os.path.exists(golden_path):
+            print(f"   ❌ No golden workbook at {golden_path} (run with --update to create it)")
+            passed = False
+            continue
+        for sheet_name, differences in compare_workbooks(golden_path, os.path.join(work_dir, workbook_name)).items():
+            if differences:
+                passed = False
+                print(f"   ❌ {sheet_name}")
+                for difference in differences:
+                    print(f"      {difference}")
+            else:
+                print(f"   ✅ {sheet_name}")
+
+        if not check_performance:
+            continue
+        baseline = load_baseline(tool)
+        if baseline is None:
+            print("   ⚠️  No performance baseline stored - performance not checked")
+            continue
+        regressions = compare_performance(baseline, reports[tool], **thresholds)
+        if regressions:
+            passed = False
+            print("   ❌ Performance regressions:")
+            for regression in regressions:
+                print(f"      {regression}")
+        else:
+            print(f"   ✅ Performance within thresholds ({reports[tool]['wall_seconds']:.1f}s "
+                  f"vs baseline {baseline['wall_seconds']:.1f}s)")
+    return passed
+
+def main():
+    parser = argparse.ArgumentParser(description='Golden-output regression harness for the DLM analyzers')
+    parser.add_argument('--update', action='store_true', help='store this run as the new goldens and baselines')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='store only the performance baselines (e.g. on a new machine)')
+    parser.add_argument('--skip-performance', action='store_true', help='only compare the sheets')
+    parser.add_argument('--time-threshold', type=float, default=DEFAULT_TIME_THRESHOLD,
+                        help='allowed wall-time increase per stage, as a fraction (0.5 = +50%%)')
+    parser.add_argument('--memory-threshold', type=float, default=DEFAULT_MEMORY_THRESHOLD,
+                        help='allowed peak-RSS increase per stage, as a fraction')
+    parser.add_argument('--min-seconds', type=float, default=DEFAULT_MIN_SECONDS,
+                        help='ignore wall-time increases smaller than this')
+    parser.add_argument('--min-mb', type=float, default=DEFAULT_MIN_MB, help='ignore peak-RSS increases smaller than this')
+    parser.add_argument('--keep', action='store_true', help="keep this run's outputs and logs")
+    args = parser.parse_args()
+
+    print("🧪 DLM Regression Harness")
+    print("=" * 60)
+    print(f"Inventory: {INVENTORY_CSV}   As-of date: {GOLDEN_AS_OF}   Goldens: {GOLDEN_DIR}")
+
+    work_dir = tempfile.mkdtemp(prefix='dlm_regression_')
+    try:
+        reports = run_pipeline(work_dir)
+        if args.update or args.update_baseline:
+            update_goldens(work_dir, reports, workbooks=args.update)
+            passed = True
+        else:
+            passed = check_against_goldens(
+                work_dir, reports, check_performance=not args.skip_performance,
+                time_threshold=args.time_threshold, memory_threshold=args.memory_threshold,
+                min_seconds=args.min_seconds, min_mb=args.min_mb
+            )
+            print("\n🔍 Purchase date edge cases")
+            date_failures = check_date_edge_cases()
+            for failure in date_failures:
+                print(f"   ❌ {failure}")
+            if not date_failures:
+                print(f"   ✅ {len(DATE_EDGE_CASES)} columns validated as expected")
+            passed = passed and not date_failures
+            print(f"\n{'✅ All outputs match the goldens' if passed else '❌ Regression detected'}")
+    finally:
+        if args.keep:
+            print(f"📂 Run outputs kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    sys.exit(0 if passed else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import argparse
+import json
+import time
+import numpy as np
+import pandas as pd
+from excel_report_writer import write_styled_workbook
+from inventory_schema import parse_currency
+from purchase_date_validator import resolve_as_of
+from risk_forecast import forecast_quarters
+from risk_model import AGE_BANDS, RISK_LEVELS, load_risk_model, scaled_points
+
+OPTIMIZER_SHEET_COLORS = {
+    'Replacement_Summary': ('8E44AD', 'E8DAEF'),
+    'Replacement_Schedule': ('C0392B', 'F5B7B1'),
+    'Site_Replacement_Summary': ('1F618D', 'D6EAF8')
+}
+
+SCHEDULE_COLUMNS = ['Asset Tag ID', 'Site', 'Location', 'Category', 'Brand', 'Device_Age_Years',
+                    'Risk_Level', 'Total_Risk_Score']
+
+def risk_reduction(df, model=None):
+    """
+    Risk removed by replacing each device: a new device keeps its brand and category scores
+    but drops to the lowest age band, so the reduction is its age score above that band's points.
+    """
+    model = model or load_risk_model()
+    new_device_points = scaled_points(model, 'age', AGE_BANDS)[AGE_BANDS.index('low')]
+    return (df['Age_Risk_Score'].to_numpy(dtype=float) - new_device_points).clip(min=0)
+
+def replacement_costs(df):
+    """
+    Replacement cost per device from the Cost column ('740.00' or '$999.00' strings).
+    Missing or zero costs are estimated with the median known cost of the device's category
+    (overall median as a last resort). Returns (costs, estimated flags).
+    """
+    cost = parse_currency(df['Cost']) if 'Cost' in df.columns else pd.Series(np.nan, index=df.index)
+    cost = cost.where(cost > 0)
+    estimated = cost.isna()
+    if 'Category' in df.columns:
+        cost = cost.fillna(cost.groupby(df['Category']).transform('median'))
+    cost = cost.fillna(cost.median() if cost.notna().any() else 0)
+    return cost.to_numpy(dtype=float), estimated.to_numpy()
+
+def optimize_replacements(df, budgets, site_capacity=None, default_site_capacity=None,
+                          carry_over=False, model=None):
+    """
+    Pick the devices to replace in each period so total risk reduction is as large as possible
+    within each period's budget and each site's capacity (replacements per site per period).
+    Greedy knapsack heuristic over sorted arrays: candidates are ranked once by risk reduction per dollar
+    (bigger reductions first on ties), and each period repeatedly takes the longest affordable prefix of
+    the ranked candidates that still fit, with per-site capacity applied by rank within site.
+    site_capacity: {site: max replacements per period}; default_site_capacity for sites not listed (None = no limit)
+    carry_over: unspent budget rolls into the next period
+    Returns (period per device or -1 if not scheduled, risk reduction, cost, cost estimated flags).
+    """
+    reduction = risk_reduction(df, model)
+    cost, estimated = replacement_costs(df)
+    period = np.full(len(df), -1)
+
+    sites = df['Site'].astype(object).fillna('Unknown') if 'Site' in df.columns else pd.Series('Unknown', index=df.index)
+    site_codes, site_names = pd.factorize(sites)
+    capacity = np.array([(site_capacity or {}).get(site, default_site_capacity) for site in site_names], dtype=float)
+    capacity[np.isnan(capacity)] = np.inf
+
+    # Rank candidates once: best reduction per dollar first, bigger reduction breaking ties
+    candidates = np.flatnonzero(reduction > 0)
+    ratio = reduction[candidates] / np.maximum(cost[candidates], 0.01)
+    candidates = candidates[np.lexsort((-reduction[candidates], -ratio))]
+    candidate_cost, candidate_site = cost[candidates], site_codes[candidates]
+    scheduled = np.zeros(len(candidates), dtype=bool)
+
+    carried = 0.0
+    for period_index, budget in enumerate(budgets):
+        remaining = budget + carried
+        site_left = capacity.copy()
+        while True:
+            open_slots = np.flatnonzero(~scheduled & (candidate_cost <= remaining) & (site_left[candidate_site] > 0))
+            if len(open_slots) == 0:
+                break
+            # Per-site capacity: keep each site's best-ranked candidates up to its remaining slots
+            rank_in_site = pd.Series(candidate_site[open_slots]).groupby(candidate_site[open_slots]).cumcount().to_numpy()
+            open_slots = open_slots[rank_in_site < site_left[candidate_site[open_slots]]]
+            # Longest affordable prefix (the first candidate always fits, so every pass makes progress)
+            taken = open_slots[np.cumsum(candidate_cost[open_slots]) <= remaining]
+            scheduled[taken] = True
+            period[candidates[taken]] = period_index
+            remaining -= candidate_cost[taken].sum()
+            site_left -= np.bincount(candidate_site[taken], minlength=len(site_names))
+        carried = remaining if carry_over else 0.0
+
+    return period, reduction, cost, estimated
+
+def build_replacement_plan(df, budgets, as_of, site_capacity=None, default_site_capacity=None,
+                           carry_over=False, model=None):
+    """Run the optimizer and shape its result into the summary, schedule and per-site sheets"""
+    period, reduction, cost, estimated = optimize_replacements(
+        df, budgets, site_capacity, default_site_capacity, carry_over, model)
+    labels, _ = forecast_quarters(as_of, len(budgets))
+
+    # Schedule in pick order: by period, then best reduction per dollar first
+    chosen = np.flatnonzero(period >= 0)
+    ratio = reduction / np.maximum(cost, 0.01)
+    chosen = chosen[np.lexsort((-reduction[chosen], -ratio[chosen], period[chosen]))]
+    schedule = df.iloc[chosen][[col for col in SCHEDULE_COLUMNS if col in df.columns]].reset_index(drop=True)
+    schedule.insert(0, 'Period', np.array(labels, dtype=object)[period[chosen]])
+    schedule['Risk_Reduction'] = reduction[chosen]
+    schedule['Replacement_Cost'] = cost[chosen].round(2)
+    schedule['Cost_Estimated'] = np.where(estimated[chosen], 'Yes', 'No')
+    schedule['Reduction_Per_Dollar'] = ratio[chosen].round(4)
+    schedule['Period_Spend_To_Date'] = schedule.groupby('Period', sort=False)['Replacement_Cost'].cumsum().round(2)
+
+    spent = np.bincount(period[chosen], weights=cost[chosen], minlength=len(budgets))
+    available, carried = [], 0.0
+    for budget, period_spent in zip(budgets, spent):
+        available.append(budget + carried)
+        carried = available[-1] - period_spent if carry_over else 0.0
+    summary = pd.DataFrame({
+        'Period': labels,
+        'Budget': np.asarray(budgets, dtype=float),
+        'Available': np.round(available, 2),
+        'Spent': spent.round(2),
+        'Devices_Replaced': np.bincount(period[chosen], minlength=len(budgets)),
+        'Risk_Reduction': np.bincount(period[chosen], weights=reduction[chosen], minlength=len(budgets))
+    })
+    if 'Risk_Level' in df.columns:
+        for level in RISK_LEVELS:
+            is_level = (df['Risk_Level'].to_numpy()[chosen] == level)
+            summary[f"{level.split()[0].title()}_Risk_Replaced"] = np.bincount(
+                period[chosen], weights=is_level, minlength=len(budgets)).astype(int)
+    summary['Unspent'] = (summary['Available'] - summary['Spent']).round(2)
+    candidates = reduction > 0
+    summary['Candidates_Left_After'] = candidates.sum() - summary['Devices_Replaced'].cumsum()
+
+    site_summary = schedule.groupby(['Site', 'Period'] if 'Site' in schedule.columns else ['Period']).agg(
+        Devices_Replaced=('Replacement_Cost', 'size'),
+        Spent=('Replacement_Cost', 'sum'),
+        Risk_Reduction=('Risk_Reduction', 'sum')
+    ).round(2).reset_index()
+
+    return {
+        'Replacement_Summary': summary,
+        'Replacement_Schedule': schedule,
+        'Site_Replacement_Summary': site_summary
+    }
+
+def run_optimizer(input_excel_path, output_excel_path, budgets, as_of=None, site_capacity=None,
+                  default_site_capacity=None, carry_over=False):
+    """Load the risk analyzer's Complete_Risk_Analysis sheet, optimize the replacements and write the plan"""
+    as_of = resolve_as_of(as_of)
+    df = pd.read_excel(input_excel_path, sheet_name='Complete_Risk_Analysis')
+    print(f"Loaded {len(df)} scored devices from {input_excel_path}")
+
+    started = time.perf_counter()
+    plan = build_replacement_plan(df, budgets, as_of, site_capacity, default_site_capacity, carry_over)
+    print(f"⚡ Optimized {len(budgets)} periods in {time.perf_counter() - started:.2f}s")
+
+    print(f"\n{'Period':<8} {'Budget':>12} {'Spent':>12} {'Devices':>8} {'Risk reduced':>13}")
+    for _, row in plan['Replacement_Summary'].iterrows():
+        print(f"{row['Period']:<8} {row['Budget']:>12,.2f} {row['Spent']:>12,.2f} "
+              f"{row['Devices_Replaced']:>8} {row['Risk_Reduction']:>13,.0f}")
+
+    write_styled_workbook(output_excel_path, [(name, frame) + OPTIMIZER_SHEET_COLORS[name]
+                                              for name, frame in plan.items()])
+    print(f"\n✅ Replacement plan saved to: {output_excel_path}")
+    return plan
+
+def main():
+    parser = argparse.ArgumentParser(description='Budget-constrained device replacement optimizer')
+    parser.add_argument('--input', default='device_lifecycle_risk_analysis.xlsx',
+                        help="the risk analyzer's workbook (Complete_Risk_Analysis sheet)")
+    parser.add_argument('--output', default='replacement_plan.xlsx')
+    parser.add_argument('--budget', type=float, nargs='+', default=[50000],
+                        help='budget per quarter; one value is repeated for every period')
+    parser.add_argument('--periods', type=int, default=4, help='number of quarters to plan')
+    parser.add_argument('--site-capacity', type=int, default=None,
+                        help='max replacements per site per quarter (default: no limit)')
+    parser.add_argument('--site-capacities', default=None,
+                        help='JSON file of {site: max replacements per quarter} overriding --site-capacity')
+    parser.add_argument('--carry-over', action='store_true', help='roll unspent budget into the next quarter')
+    parser.add_argument('--as-of', default=None, help='first quarter of the plan (default: today)')
+    args = parser.parse_args()
+
+    budgets = args.budget if len(args.budget) > 1 else args.budget * args.periods
+    site_capacity = None
+    if args.site_capacities:
+        with open(args.site_capacities, 'r', encoding='utf-8') as capacities_file:
+            site_capacity = json.load(capacities_file)
+
+    print("💰 DLM Replacement Optimizer")
+    print("=" * 60)
+    run_optimizer(args.input, args.output, budgets, args.as_of, site_capacity, args.site_capacity, args.carry_over)
+
+if __name__ == "__main__":
+    main()
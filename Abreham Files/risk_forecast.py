@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+from inventory_schema import parse_currency
+from risk_model import (AGE_BANDS, BRAND_TIER_NAMES, CATEGORY_TIER_NAMES, RISK_LEVELS, load_risk_model,
+                        risk_components, scaled_points, age_band_codes, risk_level_codes)
+
+# Default horizon: the current quarter plus the next 19 (five years)
+DEFAULT_FORECAST_QUARTERS = 20
+
+ALREADY_REACHED = 'Already'
+BEYOND_FORECAST = 'Beyond forecast'
+
+def forecast_quarters(as_of, quarters=DEFAULT_FORECAST_QUARTERS):
+    """Labels ('2025Q3') and end dates of the next N calendar quarters, starting with the as-of date's quarter"""
+    periods = pd.period_range(pd.Timestamp(as_of).to_period('Q'), periods=quarters, freq='Q')
+    return [str(period) for period in periods], periods.end_time.normalize()
+
+def project_risk(components, model, age_offsets_years):
+    """
+    Project every device's risk forward: ages + offsets as a devices x periods matrix, scored under the model
+    (brand and category scores don't change with time). Returns devices x periods age band codes,
+    total scores and risk level codes.
+    """
+    ages = components['age_years'][:, None] + np.asarray(age_offsets_years, dtype=float)[None, :]
+    thresholds, cutoffs = model['age_thresholds_years'], model['level_cutoffs']
+    age_band = age_band_codes(ages, thresholds['high'], thresholds['medium'])
+
+    fixed_score = (scaled_points(model, 'brand', BRAND_TIER_NAMES)[components['brand_tier']]
+                   + scaled_points(model, 'category', CATEGORY_TIER_NAMES)[components['category_tier']])
+    total_score = scaled_points(model, 'age', AGE_BANDS)[age_band] + fixed_score[:, None]
+    return {
+        'age_band': age_band,
+        'total_score': total_score,
+        'risk_level': risk_level_codes(total_score, cutoffs['high'], cutoffs['medium'])
+    }
+
+def first_period(reached):
+    """Index of the first period where a devices x periods boolean matrix is True (-1 where it never is)"""
+    first = reached.argmax(axis=1)
+    first[~reached.any(axis=1)] = -1
+    return first
+
+def crossing_labels(reached_now, first, labels):
+    """Quarter label per device when it first reaches a band/level ('Already' / 'Beyond forecast' otherwise)"""
+    names = np.array(list(labels) + [BEYOND_FORECAST], dtype=object)
+    crossing = names[np.where(first >= 0, first, len(labels))]
+    crossing[reached_now] = ALREADY_REACHED
+    return crossing
+
+def forecast_by(keys, labels, projected_high, newly_high, replacement_cost):
+    """Long table per key and quarter: projected HIGH-risk devices, devices newly due, and their replacement cost"""
+    def per_key(matrix, name):
+        totals = pd.DataFrame(matrix, columns=labels).groupby(keys, sort=True).sum()
+        return totals.stack().rename(name)
+
+    result = pd.concat([
+        per_key(projected_high.astype(np.int64), 'Projected_High_Risk'),
+        per_key(newly_high.astype(np.int64), 'Newly_High_Risk'),
+        per_key(replacement_cost, 'Replacement_Cost')
+    ], axis=1).round(2)
+    result.index.names = [keys.name, 'Quarter']
+    return result.reset_index()
+
+def build_risk_forecast(df, as_of, quarters=DEFAULT_FORECAST_QUARTERS, model=None):
+    """
+    Quarter-by-quarter risk forecast for every device (vectorized over devices x quarters).
+    A device is due for replacement in the first quarter it is projected HIGH RISK (devices already
+    HIGH RISK are due in the first quarter); its Cost is budgeted in that quarter.
+    Returns {sheet name: DataFrame} with the quarterly summary, the Category and Site breakdowns and
+    each device's trajectory (when it crosses the age bands and the risk cutoffs).
+    """
+    model = model or load_risk_model()
+    as_of = pd.Timestamp(as_of)
+    labels, quarter_ends = forecast_quarters(as_of, quarters)
+    offsets = np.asarray((quarter_ends - as_of).days, dtype=float) / 365.25
+
+    components = risk_components(df)
+    projection = project_risk(components, model, offsets)
+    now = project_risk(components, model, [0.0])
+    levels, bands = projection['risk_level'], projection['age_band']
+
+    projected_high = levels == RISK_LEVELS.index('HIGH RISK')
+    first_high = first_period(projected_high)
+    newly_high = np.zeros_like(projected_high)
+    due = np.flatnonzero(first_high >= 0)
+    newly_high[due, first_high[due]] = True
+
+    cost = parse_currency(df['Cost']).fillna(0).to_numpy(dtype=float) if 'Cost' in df.columns else np.zeros(len(df))
+    replacement_cost = newly_high * cost[:, None]
+
+    quarterly = pd.DataFrame({
+        'Quarter': labels,
+        'Quarter_End': quarter_ends.date,
+        'Projected_High_Risk': projected_high.sum(axis=0),
+        'Projected_Medium_Risk': (levels == RISK_LEVELS.index('MEDIUM RISK')).sum(axis=0),
+        'Projected_Low_Risk': (levels == RISK_LEVELS.index('LOW RISK')).sum(axis=0),
+        'Newly_High_Risk': newly_high.sum(axis=0),
+        'Replacement_Cost': replacement_cost.sum(axis=0).round(2)
+    })
+    quarterly['Cumulative_Replacement_Cost'] = quarterly['Replacement_Cost'].cumsum().round(2)
+
+    sheets = {'Risk_Forecast_Quarterly': quarterly}
+    for sheet_name, dim in [('Forecast_By_Category', 'Category'), ('Forecast_By_Site', 'Site')]:
+        if dim in df.columns:
+            keys = pd.Series(df[dim].astype(object).fillna('Unknown').to_numpy(), name=dim)
+            sheets[sheet_name] = forecast_by(keys, labels, projected_high, newly_high, replacement_cost)
+
+    trajectory = df[[col for col in ['Asset Tag ID', 'Site', 'Category', 'Brand', 'Device_Age_Years']
+                     if col in df.columns]].reset_index(drop=True)
+    trajectory['Current_Risk_Score'] = now['total_score'][:, 0]
+    trajectory['Current_Risk_Level'] = np.array(RISK_LEVELS, dtype=object)[now['risk_level'][:, 0]]
+    medium_band, high_band = AGE_BANDS.index('medium'), AGE_BANDS.index('high')
+    trajectory['Reaches_Medium_Age_Band'] = crossing_labels(now['age_band'][:, 0] <= medium_band,
+                                                            first_period(bands <= medium_band), labels)
+    trajectory['Reaches_High_Age_Band'] = crossing_labels(now['age_band'][:, 0] == high_band,
+                                                          first_period(bands == high_band), labels)
+    # Level codes run HIGH = 0, MEDIUM = 1, LOW = 2, so 'at least MEDIUM' is code <= 1
+    medium_level = RISK_LEVELS.index('MEDIUM RISK')
+    trajectory['Reaches_Medium_Risk'] = crossing_labels(now['risk_level'][:, 0] <= medium_level,
+                                                        first_period(levels <= medium_level), labels)
+    trajectory['Reaches_High_Risk'] = crossing_labels(now['risk_level'][:, 0] == RISK_LEVELS.index('HIGH RISK'),
+                                                      first_high, labels)
+    trajectory['Replacement_Quarter'] = np.array(labels + [BEYOND_FORECAST], dtype=object)[
+        np.where(first_high >= 0, first_high, len(labels))]
+    trajectory['Replacement_Cost'] = cost
+    sheets['Device_Risk_Trajectory'] = trajectory
+    return sheets
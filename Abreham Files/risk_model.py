@@ -0,0 +1,227 @@
+import copy
+import json
+import os
+import numpy as np
+import pandas as pd
+from keyword_matcher import compile_keyword_matcher, match_text
+
+# The risk model lives in a JSON file next to this script so weights and cutoffs don't need code edits
+RISK_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'risk_model.json')
+
+# Built-in model, used when the model file is missing or doesn't define a setting.
+# Points are on the default 50/30/20 scale; a component's weight is the most points it can add,
+# so setting e.g. weights.age to 60 scales every age score by 60/50.
+DEFAULT_RISK_MODEL = {
+    'weights': {'age': 50, 'brand': 30, 'category': 20},
+    'age_thresholds_years': {'high': 5, 'medium': 3},
+    'level_cutoffs': {'high': 70, 'medium': 35},
+    'age_points': {'high': 50, 'medium': 25, 'low': 5, 'unknown': 0},
+    'brand_points': {'tier1': 5, 'tier2': 15, 'other': 25, 'unknown': 30},
+    'category_points': {'critical': 20, 'important': 10, 'standard': 3, 'other': 15, 'unknown': 20}
+}
+
+# Brand tiers, compiled once (tier1 is checked first)
+BRAND_TIERS = {
+    # Tier 1: Enterprise/Premium brands (Low Risk)
+    'tier1': ['hp', 'dell', 'lenovo', 'apple', 'microsoft', 'cisco', 'canon',
+              'fujitsu', 'lg', 'samsung', 'sony', 'xerox', 'epson'],
+    # Tier 2: Reliable consumer brands (Medium Risk)
+    'tier2': ['acer', 'asus', 'logitech', 'netgear', 'linksys', 'viewsonic',
+              'optoma', 'western digital', 'wd', 'seagate', 'nikon', 'olympus']
+}
+
+# Category criticality tiers, compiled once (critical is checked first)
+CATEGORY_TIERS = {
+    # Critical infrastructure devices (High Risk if old)
+    'critical': ['server', 'network firewall', 'network router', 'network switch',
+                 'network wap', 'defibrillator', 'ups'],
+    # Important business devices (Medium Risk)
+    'important': ['desktop', 'laptop', 'printer', 'monitor', 'projector',
+                  'phone ip', 'timeclock'],
+    # Standard/accessory devices (Low Risk)
+    'standard': ['tablet', 'phone cell', 'phone bluetooth', 'webcam', 'speakers',
+                 'camera', 'camcorder', 'charger', 'computer accessory',
+                 'phone accessory', 'docking station']
+}
+
+# Brand keywords must match whole words: as plain substrings 'lg' or 'hp' made any brand containing
+# those letters (e.g. 'Bulgin', 'Shpock') a Tier 1 brand
+BRAND_TIER_MATCHER = compile_keyword_matcher(BRAND_TIERS, word_boundary=True)
+CATEGORY_TIER_MATCHER = compile_keyword_matcher(CATEGORY_TIERS, word_boundary={'ups'})
+
+# Component levels in the order used for the code arrays
+AGE_BANDS = ['high', 'medium', 'low', 'unknown']
+BRAND_TIER_NAMES = ['tier1', 'tier2', 'other', 'unknown']
+CATEGORY_TIER_NAMES = ['critical', 'important', 'standard', 'other', 'unknown']
+RISK_LEVELS = ['HIGH RISK', 'MEDIUM RISK', 'LOW RISK']
+
+BRAND_TIER_REASONS = {
+    'tier1': 'Low Risk (Premium Brand)',
+    'tier2': 'Medium Risk (Consumer Brand)',
+    'other': 'High Risk (Lesser Known Brand)',
+    'unknown': 'High Risk (Unknown Brand)'
+}
+
+CATEGORY_TIER_REASONS = {
+    'critical': 'High Risk (Critical Infrastructure)',
+    'important': 'Medium Risk (Business Essential)',
+    'standard': 'Low Risk (Standard Equipment)',
+    'other': 'Medium Risk (Unclassified Category)',
+    'unknown': 'High Risk (Unknown Category)'
+}
+
+def validate_risk_model(model):
+    """Raise ValueError when a model can't be scored (negative weights, crossed thresholds or cutoffs)"""
+    for section in ['weights', 'age_points', 'brand_points', 'category_points']:
+        for key, value in model[section].items():
+            if value < 0:
+                raise ValueError(f"Risk model {section}.{key} must not be negative (got {value})")
+    thresholds, cutoffs = model['age_thresholds_years'], model['level_cutoffs']
+    if not 0 <= thresholds['medium'] <= thresholds['high']:
+        raise ValueError(f"Risk model age thresholds must satisfy 0 <= medium <= high (got {thresholds})")
+    if not cutoffs['medium'] <= cutoffs['high']:
+        raise ValueError(f"Risk model level cutoffs must satisfy medium <= high (got {cutoffs})")
+    return model
+
+def apply_model_overrides(model, overrides):
+    """
+    Copy of model with dotted-key overrides applied, e.g. {'weights.age': 60, 'level_cutoffs.high': 75}.
+    Unknown keys raise ValueError so a typo in a scenario can't silently do nothing.
+    """
+    updated = copy.deepcopy(model)
+    for dotted_key, value in overrides.items():
+        section, _, key = dotted_key.partition('.')
+        if section not in updated or key not in updated[section]:
+            raise ValueError(f"Unknown risk model setting: {dotted_key}")
+        updated[section][key] = value
+    return validate_risk_model(updated)
+
+def load_risk_model(model_path=RISK_MODEL_PATH):
+    """Load the risk model from the model file, falling back to the built-in model for anything it doesn't set"""
+    model = copy.deepcopy(DEFAULT_RISK_MODEL)
+
+    if model_path and os.path.exists(model_path):
+        try:
+            with open(model_path, 'r', encoding='utf-8') as model_file:
+                settings = json.load(model_file)
+            overrides = {f"{section}.{key}": value
+                         for section, values in settings.items() for key, value in values.items()}
+            model = apply_model_overrides(model, overrides)
+        except Exception as e:
+            print(f"  ⚠️  Could not read risk model from {model_path}: {e}")
+            print("  Using built-in risk model")
+            model = copy.deepcopy(DEFAULT_RISK_MODEL)
+
+    return model
+
+def brand_tier(brand):
+    """Tier name for one brand: 'tier1', 'tier2', 'other' or 'unknown' (missing/blank)"""
+    if pd.isna(brand) or str(brand).strip() == '':
+        return 'unknown'
+    return match_text(BRAND_TIER_MATCHER, brand, default='other')
+
+def category_tier(category):
+    """Tier name for one category: 'critical', 'important', 'standard', 'other' or 'unknown' (missing/blank)"""
+    if pd.isna(category) or str(category).strip() == '':
+        return 'unknown'
+    return match_text(CATEGORY_TIER_MATCHER, category, default='other')
+
+def tier_codes(values, tier_function, tier_names):
+    """Tier code per row: each distinct value is classified once and broadcast back through its factorized code"""
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    # The extra last entry classifies missing values (code -1)
+    unique_codes = np.array([tier_names.index(tier_function(value)) for value in uniques]
+                            + [tier_names.index(tier_function(np.nan))], dtype=np.int8)
+    return unique_codes[codes]
+
+def risk_components(df):
+    """
+    The scored component matrix every model and scenario is evaluated over:
+    device age in years plus brand and category tier codes, computed once per frame.
+    """
+    return {
+        'age_years': np.asarray(df['Device_Age_Years'], dtype=float),
+        'brand_tier': tier_codes(df['Brand'], brand_tier, BRAND_TIER_NAMES),
+        'category_tier': tier_codes(df['Category'], category_tier, CATEGORY_TIER_NAMES)
+    }
+
+def scaled_points(model, component, level_names):
+    """Points per component level scaled to the component's weight (whole numbers stay integers)"""
+    points = np.array([model[f"{component}_points"][name] for name in level_names], dtype=float)
+    max_points = points.max()
+    scaled = points * model['weights'][component] / max_points if max_points else points
+    scaled = np.round(scaled, 2)
+    return scaled.astype(np.int64) if np.all(scaled == np.round(scaled)) else scaled
+
+def age_reasons(model):
+    """Age reason text per age band, worded from the model's thresholds"""
+    high, medium = model['age_thresholds_years']['high'], model['age_thresholds_years']['medium']
+    return [f"High Risk ({high:g}+ years old)", f"Medium Risk ({medium:g}-{high:g} years old)",
+            f"Low Risk (<{medium:g} years old)", 'Unknown Age']
+
+def age_band_codes(age_years, high_age, medium_age):
+    """Age band code (index into AGE_BANDS) for an array of ages; thresholds broadcast against the ages"""
+    age_band = np.where(age_years >= high_age, 0, np.where(age_years >= medium_age, 1, 2)).astype(np.int8)
+    age_band[np.isnan(np.broadcast_to(age_years, age_band.shape))] = AGE_BANDS.index('unknown')
+    return age_band
+
+def risk_level_codes(total_score, high_cutoff, medium_cutoff):
+    """Risk level code (index into RISK_LEVELS) for an array of total scores; cutoffs broadcast against the scores"""
+    return np.where(total_score >= high_cutoff, 0, np.where(total_score >= medium_cutoff, 1, 2)).astype(np.int8)
+
+def score_models(components, models):
+    """
+    Score every device under every model in one vectorized pass.
+    Returns n_devices x n_models arrays: age band codes, age/brand/category scores, total score and
+    risk level codes (index into RISK_LEVELS).
+    """
+    high_ages = np.array([model['age_thresholds_years']['high'] for model in models])[None, :]
+    medium_ages = np.array([model['age_thresholds_years']['medium'] for model in models])[None, :]
+    age_band = age_band_codes(components['age_years'][:, None], high_ages, medium_ages)
+
+    # Points tables: one row per model, one column per level; rows are picked per model column
+    model_index = np.arange(len(models))[None, :]
+    age_points = np.array([scaled_points(model, 'age', AGE_BANDS) for model in models])
+    brand_points = np.array([scaled_points(model, 'brand', BRAND_TIER_NAMES) for model in models])
+    category_points = np.array([scaled_points(model, 'category', CATEGORY_TIER_NAMES) for model in models])
+
+    age_score = age_points[model_index, age_band]
+    brand_score = brand_points[model_index, components['brand_tier'][:, None]]
+    category_score = category_points[model_index, components['category_tier'][:, None]]
+    total_score = age_score + brand_score + category_score
+
+    high_cutoffs = np.array([model['level_cutoffs']['high'] for model in models])[None, :]
+    medium_cutoffs = np.array([model['level_cutoffs']['medium'] for model in models])[None, :]
+    risk_level = risk_level_codes(total_score, high_cutoffs, medium_cutoffs)
+
+    return {
+        'age_band': age_band,
+        'age_score': age_score,
+        'brand_score': brand_score,
+        'category_score': category_score,
+        'total_score': total_score,
+        'risk_level': risk_level
+    }
+
+def apply_risk_scores(df, model=None):
+    """
+    Add the age/brand/category scores and reasons, Total_Risk_Score and Risk_Level to df under one model
+    (the configured model by default). Label columns stay object dtype so no per-row string conversion is paid.
+    """
+    model = model or load_risk_model()
+    components = risk_components(df)
+    scores = score_models(components, [model])
+
+    def labels(names, codes):
+        return pd.Series(np.array(names, dtype=object)[codes], index=df.index, dtype=object)
+
+    df['Age_Risk_Score'] = scores['age_score'][:, 0]
+    df['Age_Risk_Reason'] = labels(age_reasons(model), scores['age_band'][:, 0])
+    df['Brand_Risk_Score'] = scores['brand_score'][:, 0]
+    df['Brand_Risk_Reason'] = labels([BRAND_TIER_REASONS[name] for name in BRAND_TIER_NAMES], components['brand_tier'])
+    df['Category_Risk_Score'] = scores['category_score'][:, 0]
+    df['Category_Risk_Reason'] = labels([CATEGORY_TIER_REASONS[name] for name in CATEGORY_TIER_NAMES],
+                                        components['category_tier'])
+    df['Total_Risk_Score'] = scores['total_score'][:, 0]
+    df['Risk_Level'] = labels(RISK_LEVELS, scores['risk_level'][:, 0])
+    return df
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+# Devices kept per risk level / per site or category in the priority lists
+DEFAULT_TOP_K = 50
+DEFAULT_GROUP_TOP_K = 10
+
+def top_k_positions(scores, k):
+    """
+    Positions of the k highest scores, highest first, by partial selection (no full sort).
+    Ties keep their original order, so the result equals the first k rows of a stable descending sort.
+    Missing scores rank last.
+    """
+    scores = np.nan_to_num(np.asarray(scores, dtype=float), nan=-np.inf)
+    if k <= 0 or len(scores) == 0:
+        return np.array([], dtype=np.int64)
+    if k >= len(scores):
+        return np.argsort(-scores, kind='stable')
+
+    kth_score = np.partition(scores, len(scores) - k)[len(scores) - k]
+    above = np.flatnonzero(scores > kth_score)
+    ties = np.flatnonzero(scores == kth_score)[:k - len(above)]
+    chosen = np.concatenate([above, ties])
+    return chosen[np.argsort(-scores[chosen], kind='stable')]
+
+def top_k(df, k, score_column='Total_Risk_Score'):
+    """The k highest-scoring rows of df, highest first"""
+    return df.iloc[top_k_positions(df[score_column], k)]
+
+def top_k_by_group(df, k, group_columns, score_column='Total_Risk_Score'):
+    """
+    The k highest-scoring rows within each group (e.g. per Site or per Category), groups in key order.
+    Rows are bucketed by group code once, then each bucket is partially selected.
+    Rows with a missing group key are left out, as in a groupby.
+    """
+    keys = df[group_columns[0]] if len(group_columns) == 1 else pd.MultiIndex.from_frame(df[group_columns])
+    codes, _ = pd.factorize(keys, sort=True)
+    order = np.argsort(codes, kind='stable')
+    order = order[codes[order] >= 0]
+    scores = df[score_column].to_numpy()
+
+    positions = [np.array([], dtype=np.int64)]
+    for bucket in np.split(order, np.flatnonzero(np.diff(codes[order])) + 1):
+        positions.append(bucket[top_k_positions(scores[bucket], k)])
+    return df.iloc[np.concatenate(positions)]
+
+def add_priority_rank(frame, level_column='Risk_Level', score_column='Total_Risk_Score'):
+    """
+    Dense rank by score within each risk level, computed on a top-K frame. Every higher score of a level
+    is inside its top K, so the ranks equal the dense ranks over the whole fleet.
+    """
+    frame = frame.copy()
+    frame['Priority_Rank'] = frame.groupby(level_column)[score_column].rank(method='dense', ascending=False).astype(int)
+    return frame
+
+def start_running_top_k(k, group_column=None, score_column='Total_Risk_Score'):
+    """State for a top-K kept across streamed chunks (overall, or per group such as Risk_Level)"""
+    return {'k': k, 'group_column': group_column, 'score_column': score_column, 'rows': None}
+
+def update_running_top_k(state, chunk):
+    """
+    Fold one chunk into the running top-K. Like a bounded min-heap, only the current K rows (per group)
+    are kept: the chunk's own top K is selected first, then merged with them and cut back to K.
+    """
+    if len(chunk) == 0:
+        return state
+    select = (lambda frame: top_k_by_group(frame, state['k'], [state['group_column']], state['score_column'])) \
+        if state['group_column'] else (lambda frame: top_k(frame, state['k'], state['score_column']))
+    candidates = select(chunk)
+    if state['rows'] is not None:
+        # Earlier chunks first, so ties keep their original (file) order
+        candidates = pd.concat([state['rows'], candidates], ignore_index=True)
+    state['rows'] = select(candidates).reset_index(drop=True)
+    return state
+
+def running_top_k_result(state):
+    """The running top-K rows (empty frame when nothing was streamed)"""
+    return state['rows'] if state['rows'] is not None else pd.DataFrame()
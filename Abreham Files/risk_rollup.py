@@ -0,0 +1,85 @@
+import pandas as pd
+from risk_model import RISK_LEVELS
+
+# Dimensions the cube can roll risk up by (only those present in the frame are used)
+ROLLUP_DIMENSIONS = ['Brand', 'Category', 'Site', 'Location', 'School District', 'Assigned to']
+
+# Rollups written as dashboard sheets: sheet name -> dimensions
+ROLLUP_SHEETS = {
+    'Site_Risk_Rollup': ('Site',),
+    'Location_Risk_Rollup': ('Site', 'Location'),
+    'District_Risk_Rollup': ('School District',),
+    'Assignee_Risk_Rollup': ('Assigned to',),
+    'Site_Category_Risk_Rollup': ('Site', 'Category')
+}
+
+ROLLUP_METRICS = ['Device_Count', 'Avg_Risk_Score', 'Max_Risk_Score', 'Avg_Age_Years',
+                  'High_Risk_Count', 'Medium_Risk_Count', 'Low_Risk_Count']
+
+# Additive per-cell totals the rollups are re-aggregated from (max for the score maximum)
+CELL_AGGREGATIONS = {
+    'device_count': 'sum', 'score_sum': 'sum', 'score_max': 'max', 'age_sum': 'sum', 'age_count': 'sum',
+    'high_count': 'sum', 'medium_count': 'sum', 'low_count': 'sum'
+}
+
+def build_risk_cube(df, dimensions=None):
+    """
+    One grouped pass over the scored frame at the finest grain (every combination of the dimensions
+    that occurs), keeping additive totals per cell. Rollups and drilldowns then re-aggregate these
+    few cells instead of re-grouping every device. Missing keys are kept as their own cells here and
+    only dropped by the rollups that group on them.
+    """
+    dimensions = [dim for dim in (dimensions or ROLLUP_DIMENSIONS) if dim in df.columns]
+    keys = {dim: df[dim].astype('category') for dim in dimensions}
+    values = pd.DataFrame({
+        'device_count': 1,
+        'score_sum': df['Total_Risk_Score'],
+        'score_max': df['Total_Risk_Score'],
+        'age_sum': df['Device_Age_Years'].fillna(0),
+        'age_count': df['Device_Age_Years'].notna().astype(int),
+        'high_count': (df['Risk_Level'] == RISK_LEVELS[0]).astype(int),
+        'medium_count': (df['Risk_Level'] == RISK_LEVELS[1]).astype(int),
+        'low_count': (df['Risk_Level'] == RISK_LEVELS[2]).astype(int)
+    }, index=df.index)
+    cells = values.groupby([keys[dim] for dim in dimensions], observed=True, dropna=False).agg(CELL_AGGREGATIONS)
+    return {'dimensions': dimensions, 'cells': cells.reset_index(), 'rollups': {}}
+
+def rollup(cube, dimensions, filters=None):
+    """
+    Risk metrics per combination of the given dimensions (Device_Count, Avg/Max_Risk_Score, Avg_Age_Years,
+    per-level counts), indexed by the dimensions in sorted key order. filters ({dimension: value or list})
+    restricts the cells first, for drilldowns such as one site's locations. Results are cached on the cube.
+    """
+    dimensions = tuple(dimensions)
+    missing = [dim for dim in dimensions + tuple(filters or {}) if dim not in cube['dimensions']]
+    if missing:
+        raise ValueError(f"Rollup dimensions not in the cube: {missing}")
+    cache_key = (dimensions, tuple(sorted((dim, str(value)) for dim, value in (filters or {}).items())))
+    if cache_key in cube['rollups']:
+        return cube['rollups'][cache_key]
+
+    cells = cube['cells']
+    for dim, value in (filters or {}).items():
+        cells = cells[cells[dim].isin(value if isinstance(value, (list, tuple, set)) else [value])]
+
+    totals = cells.groupby(list(dimensions), observed=True).agg(CELL_AGGREGATIONS)
+    result = pd.DataFrame({
+        'Device_Count': totals['device_count'],
+        'Avg_Risk_Score': totals['score_sum'] / totals['device_count'],
+        'Max_Risk_Score': totals['score_max'],
+        'Avg_Age_Years': totals['age_sum'] / totals['age_count'],
+        'High_Risk_Count': totals['high_count'],
+        'Medium_Risk_Count': totals['medium_count'],
+        'Low_Risk_Count': totals['low_count']
+    }).round(1)
+    # Plain labels in the index (not categoricals) so sheets and lookups behave like a normal groupby
+    result.index = result.index.astype(object) if len(dimensions) == 1 else pd.MultiIndex.from_tuples(
+        list(result.index), names=result.index.names)
+
+    cube['rollups'][cache_key] = result
+    return result
+
+def rollup_sheet(cube, dimensions, metrics=ROLLUP_METRICS, filters=None):
+    """A rollup as a dashboard sheet: dimensions as columns, riskiest (highest average score) first"""
+    result = rollup(cube, dimensions, filters)[metrics]
+    return result.sort_values('Avg_Risk_Score', ascending=False).reset_index()
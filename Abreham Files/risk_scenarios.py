@@ -0,0 +1,138 @@
+import argparse
+import itertools
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from device_lifecycle_risk_analyzer import load_analysis_ready_data
+from excel_report_writer import EXCEL_MAX_ROWS, write_styled_workbook
+from purchase_date_validator import resolve_as_of, parse_purchase_dates, calculate_age_years
+from risk_model import RISK_LEVELS, load_risk_model, apply_model_overrides, risk_components, score_models
+
+# Scenario definitions live next to this script, like risk_model.json
+SCENARIOS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'risk_scenarios.json')
+
+# Scenarios are scored in blocks so the device x scenario matrices stay around this many cells
+SCENARIO_BLOCK_CELLS = 20000000
+
+SCENARIO_SHEET_COLORS = {
+    'Scenario_Summary': ('8E44AD', 'E8DAEF'),
+    'Level_Changes': ('2C3E50', 'EBF5FB')
+}
+
+def expand_scenarios(spec):
+    """
+    Turn a scenario file into a list of (name, overrides):
+    named scenarios first, then every combination of the grid values.
+        {"scenarios": [{"name": "Age heavy", "overrides": {"weights.age": 60, "weights.brand": 25}}],
+         "grid": {"weights.age": [40, 50, 60], "level_cutoffs.high": [65, 70, 75]}}
+    """
+    scenarios = [(scenario['name'], scenario.get('overrides', {})) for scenario in spec.get('scenarios', [])]
+    grid = spec.get('grid', {})
+    if grid:
+        keys = list(grid)
+        for values in itertools.product(*(grid[key] for key in keys)):
+            overrides = dict(zip(keys, values))
+            scenarios.append((', '.join(f"{key}={value}" for key, value in overrides.items()), overrides))
+    return scenarios
+
+def load_scenarios(scenarios_path=SCENARIOS_PATH):
+    with open(scenarios_path, 'r', encoding='utf-8') as scenarios_file:
+        return expand_scenarios(json.load(scenarios_file))
+
+def evaluate_scenarios(df, scenarios, base_model=None):
+    """
+    Score every scenario over the same component matrix (ages and brand/category tiers computed once)
+    in vectorized blocks. Returns (summary, level_changes):
+    summary: one row per scenario (baseline first) with HIGH/MEDIUM/LOW counts and devices changing level
+    level_changes: one row per device and scenario where the risk level differs from the baseline
+    """
+    base_model = base_model or load_risk_model()
+    models = [apply_model_overrides(base_model, overrides) for _, overrides in scenarios]
+    components = risk_components(df)
+
+    baseline = score_models(components, [base_model])
+    base_levels, base_totals = baseline['risk_level'][:, 0], baseline['total_score'][:, 0]
+    summary_rows = [{
+        'Scenario': 'Baseline (risk_model.json)', 'Settings': '',
+        **{level: int((base_levels == code).sum()) for code, level in enumerate(RISK_LEVELS)},
+        'Avg_Risk_Score': round(float(base_totals.mean()), 1) if len(df) else None,
+        'Devices_Changing_Level': 0
+    }]
+    change_frames = []
+
+    block_size = max(1, SCENARIO_BLOCK_CELLS // max(len(df), 1))
+    for block_start in range(0, len(models), block_size):
+        block = scenarios[block_start:block_start + block_size]
+        scores = score_models(components, models[block_start:block_start + block_size])
+        levels, totals = scores['risk_level'], scores['total_score']
+        changed = levels != base_levels[:, None]
+
+        for column, (name, overrides) in enumerate(block):
+            summary_rows.append({
+                'Scenario': name,
+                'Settings': ', '.join(f"{key}={value}" for key, value in overrides.items()),
+                **{level: int((levels[:, column] == code).sum()) for code, level in enumerate(RISK_LEVELS)},
+                'Avg_Risk_Score': round(float(totals[:, column].mean()), 1) if len(df) else None,
+                'Devices_Changing_Level': int(changed[:, column].sum())
+            })
+            rows = np.flatnonzero(changed[:, column])
+            if len(rows):
+                devices = df.iloc[rows][[col for col in ['Asset Tag ID', 'Brand', 'Category', 'Device_Age_Years']
+                                         if col in df.columns]].reset_index(drop=True)
+                devices.insert(0, 'Scenario', name)
+                devices['Baseline_Score'] = base_totals[rows]
+                devices['Baseline_Level'] = np.array(RISK_LEVELS, dtype=object)[base_levels[rows]]
+                devices['Scenario_Score'] = totals[rows, column]
+                devices['Scenario_Level'] = np.array(RISK_LEVELS, dtype=object)[levels[rows, column]]
+                change_frames.append(devices)
+
+    level_changes = pd.concat(change_frames, ignore_index=True) if change_frames else pd.DataFrame(
+        columns=['Scenario', 'Asset Tag ID', 'Baseline_Score', 'Baseline_Level', 'Scenario_Score', 'Scenario_Level'])
+    return pd.DataFrame(summary_rows), level_changes
+
+def run_scenarios(input_excel_path, output_excel_path, scenarios_path=SCENARIOS_PATH, as_of=None, base_model=None):
+    """Load the analyzer's Analysis_Ready_Data once, evaluate every what-if scenario and write the workbook"""
+    as_of = resolve_as_of(as_of)
+    scenarios = load_scenarios(scenarios_path)
+    df = load_analysis_ready_data(input_excel_path)
+    df['Device_Age_Years'] = calculate_age_years(parse_purchase_dates(df['Purchase Date']), as_of=as_of)
+    print(f"Loaded {len(df)} devices and {len(scenarios)} scenarios from {scenarios_path}")
+
+    started = time.perf_counter()
+    summary, level_changes = evaluate_scenarios(df, scenarios, base_model)
+    print(f"⚡ Scored {len(scenarios)} scenarios x {len(df)} devices in {time.perf_counter() - started:.2f}s")
+
+    print(f"\n{'Scenario':<60} {'HIGH':>6} {'MEDIUM':>7} {'LOW':>6} {'Changed':>8}")
+    for _, row in summary.iterrows():
+        print(f"{row['Scenario'][:60]:<60} {row['HIGH RISK']:>6} {row['MEDIUM RISK']:>7} "
+              f"{row['LOW RISK']:>6} {row['Devices_Changing_Level']:>8}")
+
+    if len(level_changes) > EXCEL_MAX_ROWS:
+        print(f"  ⚠️  {len(level_changes)} level changes exceed the Excel sheet limit - writing the first {EXCEL_MAX_ROWS}")
+        level_changes = level_changes.head(EXCEL_MAX_ROWS)
+    sheets = [('Scenario_Summary', summary), ('Level_Changes', level_changes)]
+    write_styled_workbook(output_excel_path, [(name, frame) + SCENARIO_SHEET_COLORS[name] for name, frame in sheets])
+    print(f"\n✅ What-if scenarios saved to: {output_excel_path}")
+    return summary, level_changes
+
+def main():
+    parser = argparse.ArgumentParser(description='Batch what-if scenarios for the DLM risk model')
+    parser.add_argument('--input', default='device_analysis_with_categories.xlsx',
+                        help="the device analyzer's workbook (its Parquet sidecar is used when present)")
+    parser.add_argument('--output', default='risk_scenarios.xlsx')
+    parser.add_argument('--scenarios', default=SCENARIOS_PATH)
+    parser.add_argument('--as-of', default=None, help='date device ages are measured against (default: today)')
+    args = parser.parse_args()
+
+    print("🔮 DLM Risk What-If Scenarios")
+    print("=" * 60)
+    try:
+        run_scenarios(args.input, args.output, args.scenarios, args.as_of)
+    except FileNotFoundError as e:
+        print(f"Error: Could not find {e.filename or e}")
+        print("Make sure the scenario file exists and the device analyzer has written its workbook.")
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,95 @@
 ﻿import pandas as pd
-import datetime
+import numpy as np
+import importlib.util
+import os
+import sys
 from dateutil import parser
 from openpyxl import load_workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import PatternFill
 from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl.workbook import Workbook
 
+# Shared DLM components (date parsing, keyword matching) live in the Abreham Files folder next to this one
+SHARED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Abreham Files')
+
+def load_shared_module(name, shared_dir=SHARED_DIR):
+    """Import a shared DLM module from its own folder (it isn't a package); reuses it if already imported"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, os.path.join(shared_dir, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+keyword_matcher = load_shared_module('keyword_matcher')
+purchase_date_validator = load_shared_module('purchase_date_validator')
+
 # -------------------------------
 # 1. Load and Clean the CSV Data
 # -------------------------------
 def load_csv(filepath):
     return pd.read_csv(filepath)
 
-def infer_device_type(row):
-    text = f"{row.get('model', '')} {row.get('description', '')} {row.get('brand', '')}".lower()
-    if 'laptop' in text or 'notebook' in text:
-        return 'Laptop'
-    elif 'ipad' in text or 'tablet' in text:
-        return 'Tablet'
-    elif 'monitor' in text or 'display' in text:
-        return 'Monitor'
-    elif 'dock' in text:
-        return 'Docking Station'
-    elif 'phone' in text:
-        return 'Phone'
-    elif 'access point' in text or 'ap' in text:
-        return 'Access Point'
-    elif 'desktop' in text or 'prodesk' in text:
-        return 'Desktop'
-    elif 'voip' in text:
-        return 'VoIP Phone'
-    else:
-        return 'Other'
-
-def infer_os(row):
-    text = f"{row.get('model', '')} {row.get('description', '')}".lower()
-    if 'mac' in text or 'apple' in text:
-        return 'mac'
-    elif 'win11' in text or 'windows 11' in text:
-        return 'windows_11'
-    elif 'win10' in text or 'windows 10' in text:
-        return 'windows_10'
-    elif 'chrome' in text or 'chromebook' in text:
-        return 'chrome_os'
-    else:
-        return 'unknown'
+# Inference rules in if/elif precedence order: {label: keywords}
+DEVICE_TYPE_RULES = {
+    'Laptop': ['laptop', 'notebook'],
+    'Tablet': ['ipad', 'tablet'],
+    'Monitor': ['monitor', 'display'],
+    'Docking Station': ['dock'],
+    'Phone': ['phone'],
+    'Access Point': ['access point', 'ap'],
+    'Desktop': ['desktop', 'prodesk'],
+    'VoIP Phone': ['voip']
+}
+
+OS_RULES = {
+    'mac': ['mac', 'apple'],
+    'windows_11': ['win11', 'windows 11'],
+    'windows_10': ['win10', 'windows 10'],
+    'chrome_os': ['chrome', 'chromebook']
+}
+
+# Short keywords that must match a whole word ('ap' would otherwise match 'apple', 'laptop', ...)
+WHOLE_WORD_KEYWORDS = {'ap'}
+
+# Inferred columns: (column, source columns joined into the search text, rules, default label).
+# A new inferred field is one more row here - it reuses the shared search text and adds no row-wise pass.
+INFERENCE_FIELDS = [
+    ('device_type', ['model', 'description', 'brand'], DEVICE_TYPE_RULES, 'Other'),
+    ('os', ['model', 'description'], OS_RULES, 'unknown')
+]
+
+def column_text(df, col):
+    """A column as text the way an f-string renders each value ('nan' for missing); '' when the column is absent"""
+    if col not in df.columns:
+        return pd.Series('', index=df.index, dtype=object)
+    return pd.Series(df[col].to_numpy(dtype=object).astype(str), index=df.index, dtype=object)
+
+def build_search_texts(df, fields=INFERENCE_FIELDS):
+    """
+    Lower-cased search text per inferred field ('model description brand'). Texts are built column by
+    column and shared leading columns are joined only once (device type extends the OS text with the brand).
+    """
+    joined = {}
+    for _, columns, _, _ in fields:
+        for n in range(1, len(columns) + 1):
+            key = tuple(columns[:n])
+            if key not in joined:
+                part = column_text(df, columns[n - 1])
+                joined[key] = part if n == 1 else joined[key[:-1]] + ' ' + part
+    return {field: joined[tuple(columns)].str.lower() for field, columns, _, _ in fields}
+
+# One compiled matcher per inferred field, from the shared keyword matcher
+COMPILED_INFERENCE_RULES = {field: keyword_matcher.compile_keyword_matcher(rules, word_boundary=WHOLE_WORD_KEYWORDS)
+                            for field, _, rules, _ in INFERENCE_FIELDS}
+
+def infer_fields(df):
+    """Add every inferred field from the shared search text, each distinct text scanned once per field"""
+    search_texts = build_search_texts(df)
+    for field, _, _, default in INFERENCE_FIELDS:
+        df[field] = keyword_matcher.match_series(COMPILED_INFERENCE_RULES[field], search_texts[field], default)
+    return df
 
 def clean_data(df, log_file='cleaning_log.txt'):
     df.columns = [col.strip().lower().replace(' ', '_') for col in df.columns]
@@ -66,123 +111,138 @@ def clean_data(df, log_file='cleaning_log.txt'):
         else:
             log.write("[No required columns found. Skipping dropna.]\n")
 
-    df['device_type'] = df.apply(infer_device_type, axis=1)
-    df['os'] = df.apply(infer_os, axis=1)
-    return df
+    return infer_fields(df)
 
 # --------------------------------------
 # 2. Risk Scoring Criteria and Functions
 # --------------------------------------
-def categorize_device_age(purchase_date):
-    age = (datetime.datetime.now() - parser.parse(purchase_date)).days / 365
-    if age >= 5:
-        return 'High Risk', 3, 'Age >5 yrs (+3)'
-    elif 3 <= age < 5:
-        return 'Medium Risk', 2, 'Age 3-5 yrs (+2)'
-    else:
-        return 'Low Risk', 1, 'Age <3 yrs (+1)'
-
-def score_os_lifecycle(os_name):
-    return {
-        'windows_11': (1, ''),
-        'windows_10': (2, ''),
-        'windows_7': (3, ''),
-        'mac': (2, ''),
-        'chrome_os': (2, ''),
-        'unknown': (3, '')
-    }.get(os_name.lower(), (3, ''))
-
-def score_ownership(owner_field):
-    return 2 if 'shared' in str(owner_field).lower() else 1
-
-def score_brand(brand):
-    return {'apple': 1, 'microsoft': 2, 'hp': 2, 'lenovo': 2, 'lg': 3}.get(str(brand).lower(), 2)
-
-def score_device_type(device_type):
-    reasoning = ''
-    if device_type.lower() in ['laptop', 'phone', 'tablet']:
-        return 1, 'High-turnover category (+1)'
-    return 0, ''
+BRAND_SCORES = {'apple': 1, 'microsoft': 2, 'hp': 2, 'lenovo': 2, 'lg': 3}
+DEFAULT_BRAND_SCORE = 2
+HIGH_TURNOVER_TYPES = ['laptop', 'phone', 'tablet']
+LONG_WARRANTY_TYPES = ['laptop', 'desktop']
+
+# Age bands from oldest down: (minimum age in years, label, score, reason)
+AGE_BANDS = [
+    (5, 'High Risk', 3, 'Age >5 yrs (+3)'),
+    (3, 'Medium Risk', 2, 'Age 3-5 yrs (+2)'),
+    (None, 'Low Risk', 1, 'Age <3 yrs (+1)')
+]
+
+RESULT_COLUMNS = ['Asset Tag', 'Asset Name', 'Category', 'Purchase Date', 'Warranty', 'Risk Score', 'Risk Level', 'Reasoning']
 
 # ------------------------------------------------
 # 3. Total Score Calculation and Risk Categorizing
 # ------------------------------------------------
-def calculate_total_risk(row):
-    try:
-        _, age_score, age_reason = categorize_device_age(row['purchase_date'])
-        os_score, _ = score_os_lifecycle(row['os'])
-        brand_score = score_brand(row['brand'])
-        type_score, type_reason = score_device_type(row['device_type'])
-
-        total_score = age_score + brand_score + type_score
-
-        if total_score >= 5:
-            risk_level = 'High Risk'
-        elif total_score >= 3:
-            risk_level = 'Medium Risk'
-        else:
-            risk_level = 'Low Risk'
-
-        warranty = 36 if row['device_type'].lower() in ['laptop', 'desktop'] else 12
-
-        reasons = [age_reason]
-        if warranty == 12:
-            reasons.append('Warranty expired (+2)')
-        if type_reason:
-            reasons.append(type_reason)
-
-        return pd.Series({
-            'Asset Tag': row.get('asset_tag_id', 'Unknown'),
-            'Asset Name': row.get('model', 'Unknown'),
-            'Category': row['device_type'],
-            'Purchase Date': row['purchase_date'],
-            'Warranty': warranty,
-            'Risk Score': total_score,
-            'Risk Level': risk_level,
-            'Reasoning': ', '.join(reasons)
-        })
-
-    except Exception as e:
-        return pd.Series({
-            'Asset Tag': 'Error',
-            'Asset Name': 'Error',
-            'Category': '',
-            'Purchase Date': '',
-            'Warranty': '',
-            'Risk Score': '',
-            'Risk Level': 'Error',
-            'Reasoning': str(e)
-        })
+def device_ages(purchase_dates, as_of):
+    """
+    Age in years of every row. Distinct purchase dates go through the shared vectorized parser; the few
+    it can't parse are retried with dateutil, once each and only for this call, as the row-wise version did.
+    Returns (ages, errors): errors holds the message for rows whose date can't be parsed or aged, None elsewhere.
+    """
+    codes, uniques = pd.factorize(purchase_dates, use_na_sentinel=False)
+    parsed_dates = purchase_date_validator.parse_purchase_dates(pd.Series(uniques, dtype=object))
+    unique_ages = ((as_of - parsed_dates).dt.days / 365).to_numpy(copy=True)
+    unique_errors = np.full(len(uniques), None, dtype=object)
+    for i in np.flatnonzero(parsed_dates.isna().to_numpy()):
+        try:
+            unique_ages[i] = (as_of.to_pydatetime() - parser.parse(uniques[i])).days / 365
+        except Exception as e:
+            unique_errors[i] = str(e)
+    return unique_ages[codes], unique_errors[codes]
+
+def calculate_total_risk(df, as_of=None):
+    """
+    Columnar risk engine: age, brand and device-type scores, warranty, risk level and Reasoning for
+    every row at once. Rows that can't be scored (e.g. an unparseable purchase date) are isolated
+    through an error mask and get the 'Error' row, with the error message as Reasoning.
+    """
+    as_of = purchase_date_validator.resolve_as_of(as_of)
+    missing = [col for col in ['purchase_date', 'os', 'brand', 'device_type'] if col not in df.columns]
+    if missing:
+        ages, errors = np.full(len(df), np.nan), np.full(len(df), str(KeyError(missing[0])), dtype=object)
+    else:
+        ages, errors = device_ages(df['purchase_date'], as_of)
+    failed = pd.notna(errors)
+
+    band = np.select([ages >= min_age for min_age, *_ in AGE_BANDS[:-1]], range(len(AGE_BANDS) - 1),
+                     default=len(AGE_BANDS) - 1)
+    age_scores = np.array([score for *_, score, _ in AGE_BANDS])[band]
+    age_reasons = np.array([reason for *_, reason in AGE_BANDS], dtype=object)[band]
+
+    device_type = df['device_type'].astype(str).str.lower() if 'device_type' in df.columns else pd.Series('', index=df.index)
+    brand_scores = (df['brand'].astype(str).str.lower().map(BRAND_SCORES).fillna(DEFAULT_BRAND_SCORE).astype(int).to_numpy()
+                    if 'brand' in df.columns else np.full(len(df), DEFAULT_BRAND_SCORE))
+    high_turnover = device_type.isin(HIGH_TURNOVER_TYPES).to_numpy()
+    total_score = age_scores + brand_scores + high_turnover.astype(int)
+
+    risk_level = np.select([total_score >= 5, total_score >= 3], ['High Risk', 'Medium Risk'], default='Low Risk').astype(object)
+    warranty = np.where(device_type.isin(LONG_WARRANTY_TYPES), 36, 12)
+
+    reasoning = pd.Series(age_reasons, index=df.index)
+    reasoning = reasoning.where(warranty != 12, reasoning + ', Warranty expired (+2)')
+    reasoning = reasoning.where(~high_turnover, reasoning + ', High-turnover category (+1)')
+
+    def passthrough(col, default):
+        # Raw values as plain objects (missing as NaN), like the per-row Series carried them
+        return df[col].to_numpy(dtype=object, na_value=np.nan) if col in df.columns else default
+
+    results = pd.DataFrame({
+        'Asset Tag': passthrough('asset_tag_id', 'Unknown'),
+        'Asset Name': passthrough('model', 'Unknown'),
+        'Category': passthrough('device_type', ''),
+        'Purchase Date': passthrough('purchase_date', ''),
+        'Warranty': warranty,
+        'Risk Score': total_score,
+        'Risk Level': risk_level,
+        'Reasoning': reasoning.to_numpy(dtype=object)
+    }, index=df.index)
+
+    # Error rows, as the row-wise version returned them
+    if failed.any():
+        results = results.astype(object)
+        results.loc[failed, RESULT_COLUMNS[:-1]] = ['Error', 'Error', '', '', '', '', 'Error']
+        results.loc[failed, 'Reasoning'] = errors[failed]
+    return results[RESULT_COLUMNS]
 
 # --------------------------
 # 4. Apply and Export Result
 # --------------------------
-def apply_risk_analysis(df):
-    results_df = df.apply(calculate_total_risk, axis=1)
-    return results_df
+def apply_risk_analysis(df, as_of=None):
+    # One as-of date for the whole run; every column is scored at once
+    return calculate_total_risk(df, as_of)
+
+RISK_LEVEL_FILL_COLORS = {
+    'High Risk': 'FFC7CE',    # Light red
+    'Medium Risk': 'FFEB9C',  # Light yellow
+    'Low Risk': 'C6EFCE'      # Light green
+}
 
 def export_results(df, filename='processed_inventory.xlsx'):
-    selected_cols = ['Asset Tag', 'Asset Name', 'Category', 'Purchase Date', 'Warranty', 'Risk Score', 'Risk Level', 'Reasoning']
+    """
+    One sheet per risk level, streamed through a write-only workbook so memory stays flat as rows grow.
+    Each level's fill is created once and shared by all of its data cells as they are written.
+    """
+    selected_cols = RESULT_COLUMNS
 
-    wb = Workbook()
-    del wb[wb.sheetnames[0]]  # Remove default sheet
+    wb = Workbook(write_only=True)
 
-    fill_colors = {
-        'High Risk': 'FFC7CE',    # Light red
-        'Medium Risk': 'FFEB9C',  # Light yellow
-        'Low Risk': 'C6EFCE'      # Light green
-    }
+    # All three partitions from one groupby (levels with no devices still get a header-only sheet)
+    partitions = dict(tuple(df[selected_cols].groupby('Risk Level', sort=False)))
 
-    for risk_level in ['High Risk', 'Medium Risk', 'Low Risk']:
-        risk_df = df[df['Risk Level'] == risk_level][selected_cols]
+    for risk_level, fill_color in RISK_LEVEL_FILL_COLORS.items():
+        risk_df = partitions.get(risk_level, df[selected_cols].iloc[0:0])
         ws = wb.create_sheet(title=risk_level)
+        fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type="solid")
 
-        for r in dataframe_to_rows(risk_df, index=False, header=True):
-            ws.append(r)
-
-        for row in ws.iter_rows(min_row=2, min_col=1, max_col=ws.max_column):
-            for cell in row:
-                cell.fill = PatternFill(start_color=fill_colors[risk_level], end_color=fill_colors[risk_level], fill_type="solid")
+        rows = dataframe_to_rows(risk_df, index=False, header=True)
+        ws.append(next(rows))
+        for r in rows:
+            cells = []
+            for value in r:
+                cell = WriteOnlyCell(ws, value=value)
+                cell.fill = fill
+                cells.append(cell)
+            ws.append(cells)
 
     wb.save(filename)
 
@@ -1,43 +1,12 @@
+# Device type / OS inference is shared with the assessment tool (same rules, same compiled matcher)
+from invetory_Assessment_Tool import infer_fields
+
 # -------------------------------
 # 1. Load and Clean the CSV Data
 # -------------------------------
 def load_csv(filepath):
     return pd.read_csv(filepath)
 
-def infer_device_type(row):
-    text = f"{row.get('model', '')} {row.get('description', '')} {row.get('brand', '')}".lower()
-    if 'laptop' in text or 'notebook' in text:
-        return 'Laptop'
-    elif 'ipad' in text or 'tablet' in text:
-        return 'Tablet'
-    elif 'monitor' in text or 'display' in text:
-        return 'Monitor'
-    elif 'dock' in text:
-        return 'Docking Station'
-    elif 'phone' in text:
-        return 'Phone'
-    elif 'access point' in text or 'ap' in text:
-        return 'Access Point'
-    elif 'desktop' in text or 'prodesk' in text:
-        return 'Desktop'
-    elif 'voip' in text:
-        return 'VoIP Phone'
-    else:
-        return 'Other'
-
-def infer_os(row):
-    text = f"{row.get('model', '')} {row.get('description', '')}".lower()
-    if 'mac' in text or 'apple' in text:
-        return 'mac'
-    elif 'win11' in text or 'windows 11' in text:
-        return 'windows_11'
-    elif 'win10' in text or 'windows 10' in text:
-        return 'windows_10'
-    elif 'chrome' in text or 'chromebook' in text:
-        return 'chrome_os'
-    else:
-        return 'unknown'
-
 def clean_data(df, log_file='cleaning_log.txt'):
     df.columns = [col.strip().lower().replace(' ', '_') for col in df.columns]
 
@@ -58,9 +27,7 @@ def clean_data(df, log_file='cleaning_log.txt'):
         else:
             log.write("[No required columns found. Skipping dropna.]\n")
 
-    df['device_type'] = df.apply(infer_device_type, axis=1)
-    df['os'] = df.apply(infer_os, axis=1)
-    return df
+    return infer_fields(df)
 
 # --------------------------------------
 # 2. Risk Scoring Criteria and Functions